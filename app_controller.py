@@ -70,6 +70,9 @@ class AppController:
         # Initialize engines (lazy loading for Whisper)
         self.whisper_engine = None
         self.current_whisper_model = None
+        # One model is shared by concurrent jobs (e.g. multi-language):
+        # loading and transcribing are serialized, the other steps are not
+        self.whisper_lock = threading.Lock()
         
         # Initialize OpenSubtitles service
         api_key = getattr(config, 'OPENSUBTITLES_API_KEY', None)
@@ -117,7 +120,8 @@ class AppController:
         return self.whisper_engine
     
     def generate_subtitles(self, video_path, language="it", output_format="srt", 
-                          model_name="base", progress_callback=None, cancellation_token=None):
+                          model_name="base", progress_callback=None, cancellation_token=None,
+                          audio=None, output_dir=None):
         """
         Generate subtitles from video file
         
@@ -128,6 +132,9 @@ class AppController:
             model_name: Whisper model to use
             progress_callback: Function to call with progress messages
             cancellation_token: Token to check for cancellation requests
+            audio: Already extracted audio (file path or 16 kHz mono samples)
+                to reuse; skips extraction and is left to the caller to clean up
+            output_dir: Directory for the subtitle file (default: config.OUTPUT_DIR)
         
         Returns:
             Path to generated subtitle file
@@ -152,11 +159,11 @@ class AppController:
             log("0/3 - Validazione file video...")
             try:
                 video_info = self.video_validator.validate_video_file(video_path)
-                log(f"✓ Video valido - Durata: {video_info['duration_formatted']}, "
-                    f"Risoluzione: {video_info['width']}x{video_info['height']}")
+                log(f"✓ Video valido - Durata: {video_info.duration_formatted}, "
+                    f"Risoluzione: {video_info.width}x{video_info.height}")
                 
                 # Show warnings if any
-                for warning in video_info.get('warnings', []):
+                for warning in video_info.warnings:
                     log(f"⚠️ {warning}")
                     
             except VideoValidationError as e:
@@ -190,8 +197,18 @@ class AppController:
             if cancellation_token:
                 cancellation_token.check_cancelled()
             
-            audio_path = self.audio_extractor.extract_audio(video_path)
-            log(f"✓ Audio estratto: {audio_path.name}")
+            if audio is not None:
+                source_audio = audio
+                log("✓ Audio già estratto, riutilizzato")
+            else:
+                # The validation probe already knows the audio format
+                audio_path = self.audio_extractor.extract_audio(
+                    video_path,
+                    audio_format=(video_info.audio_codec, video_info.audio_sample_rate,
+                                  video_info.audio_channels)
+                )
+                source_audio = audio_path
+                log(f"✓ Audio estratto: {Path(audio_path).name}")
             
             # Step 2: Generate subtitles with Whisper
             log(f"2/3 - Generazione sottotitoli (modello: {model_name})...")
@@ -199,18 +216,18 @@ class AppController:
             if cancellation_token:
                 cancellation_token.check_cancelled()
             
-            whisper = self._get_whisper_engine(model_name)
-            
             # Progress callback for Whisper
             def whisper_progress(current, total, message):
                 if progress_callback:
                     progress_callback(f"   [{current}%] {message}")
             
-            segments = whisper.generate_subtitles(
-                audio_path=audio_path,
-                language=language,
-                progress_callback=whisper_progress
-            )
+            with self.whisper_lock:
+                whisper = self._get_whisper_engine(model_name)
+                segments = whisper.generate_subtitles(
+                    audio_path=source_audio,
+                    language=language,
+                    progress_callback=whisper_progress
+                )
             log(f"✓ Generati {len(segments)} segmenti di sottotitoli")
             
             # Step 3: Export subtitles
@@ -219,7 +236,7 @@ class AppController:
                 cancellation_token.check_cancelled()
             
             output_filename = f"{video_path.stem}.{output_format}"
-            output_path = config.OUTPUT_DIR / output_filename
+            output_path = Path(output_dir or config.OUTPUT_DIR) / output_filename
             
             self.subtitle_formatter.export(
                 segments=segments,
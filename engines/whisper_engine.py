@@ -3,6 +3,7 @@ Whisper engine for subtitle generation using OpenAI's Whisper model
 """
 import logging
 from pathlib import Path
+import numpy as np
 import whisper
 from .base_engine import SubtitleEngine
 
@@ -49,7 +50,7 @@ class WhisperEngine(SubtitleEngine):
         Generate subtitles using Whisper
         
         Args:
-            audio_path: Path to audio file
+            audio_path: Path to audio file, or 16 kHz mono float32 samples
             language: Language code (ISO 639-1)
             task: 'transcribe' or 'translate' (translate converts to English)
             progress_callback: Callback function(current, total, message) for progress updates
@@ -63,12 +64,17 @@ class WhisperEngine(SubtitleEngine):
         
         try:
             import time
-            audio_path = Path(audio_path)
             logger.info(f"Generating subtitles with Whisper ({self.model_name})")
             logger.info(f"Language: {language}, Task: {task}")
             
-            # Get audio duration for progress estimation
-            audio_duration = self._get_audio_duration(audio_path)
+            # Decoded samples are passed to Whisper as-is (no re-decoding)
+            if isinstance(audio_path, np.ndarray):
+                audio = audio_path
+                audio_duration = len(audio) / whisper.audio.SAMPLE_RATE
+            else:
+                audio = str(audio_path)
+                # Get audio duration for progress estimation
+                audio_duration = self._get_audio_duration(Path(audio_path))
             logger.info(f"Audio duration: {audio_duration:.1f} seconds")
             
             # Estimate processing time (rough approximation)
@@ -91,7 +97,7 @@ class WhisperEngine(SubtitleEngine):
             
             # Transcribe audio with verbose for progress
             result = self.model.transcribe(
-                str(audio_path),
+                audio,
                 language=language if language in self.SUPPORTED_LANGUAGES else None,
                 task=task,
                 verbose=False,
@@ -1816,6 +1816,8 @@ class SubtitleGeneratorGUI:
         """Check FFmpeg installation"""
         from utils.audio_extractor import check_ffmpeg_installed
         
+        # Explicit user check: don't trust a result cached before an install
+        check_ffmpeg_installed.cache_clear()
         if check_ffmpeg_installed():
             try:
                 import subprocess
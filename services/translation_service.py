@@ -1,6 +1,7 @@
 """
 Translation service for subtitles
 """
+import asyncio
 import logging
 from pathlib import Path
 
@@ -13,15 +14,70 @@ except ImportError:
     DEEP_TRANSLATOR_AVAILABLE = False
     logger.warning("deep-translator not installed. Translation features will be limited.")
 
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+    logger.warning("httpx not installed. Concurrent Google translation unavailable.")
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 support in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Google endpoint retries for rate limiting (429) and server errors (5xx)
+GOOGLE_MAX_RETRIES = 4
+GOOGLE_RETRY_BASE_DELAY = 1.0  # Seconds, doubled after each attempt
+# Fraction of lines allowed to stay untranslated before a file counts as failed
+MAX_FAILED_LINE_RATIO = 0.1
+
+
+class TranslationError(Exception):
+    """Raised when too much of a subtitle file could not be translated"""
+    pass
+
 
 class TranslationService:
     """Service for translating subtitles between languages"""
     
-    def __init__(self, service='google', api_key=None):
+    # Common language codes
+    _SUPPORTED_LANGUAGES = {
+        'en': 'English',
+        'it': 'Italiano', 
+        'es': 'Español',
+        'fr': 'Français',
+        'de': 'Deutsch',
+        'pt': 'Português',
+        'ru': 'Русский',
+        'ja': '日本語',
+        'zh-CN': '中文',
+        'ar': 'العربية',
+        'hi': 'हिन्दी',
+        'ko': '한국어',
+        'nl': 'Nederlands',
+        'pl': 'Polski',
+        'tr': 'Türkçe'
+    }
+    
+    # Google backends: 'httpx' sends all lines concurrently to the public
+    # translate endpoint, 'deep_translator' translates them one at a time
+    GOOGLE_BACKENDS = ('httpx', 'deep_translator')
+    
+    def __init__(self, service='google', api_key=None, google_backend='httpx'):
+        if google_backend not in self.GOOGLE_BACKENDS:
+            raise ValueError(f"Unknown Google backend: {google_backend}")
+        
         self.service = service
         self.api_key = api_key
+        self.google_backend = google_backend
+        # (source_lang, target_lang) -> GoogleTranslator, reused across segments
+        self._translator_cache = {}
         
-        if service == 'google' and not DEEP_TRANSLATOR_AVAILABLE:
+        if service == 'google' and google_backend == 'httpx' and not HTTPX_AVAILABLE:
+            logger.warning("Google Translate 'httpx' backend requires the 'httpx' package")
+        elif service == 'google' and not DEEP_TRANSLATOR_AVAILABLE:
             logger.warning("Google Translate service requires 'deep-translator' package")
     
     def translate_text(self, text, source_lang, target_lang):
@@ -56,7 +112,7 @@ class TranslationService:
         if not DEEP_TRANSLATOR_AVAILABLE:
             raise ImportError("deep-translator package not installed")
         
-        translator = GoogleTranslator(source=source_lang, target=target_lang)
+        translator = self._get_google_translator(source_lang, target_lang)
         
         # Split by newlines to preserve subtitle structure
         lines = text.split('\n')
@@ -71,6 +127,15 @@ class TranslationService:
         
         return '\n'.join(translated_lines)
     
+    def _get_google_translator(self, source_lang, target_lang):
+        """Return a cached GoogleTranslator for the language pair"""
+        key = (source_lang, target_lang)
+        translator = self._translator_cache.get(key)
+        if translator is None:
+            translator = GoogleTranslator(source=source_lang, target=target_lang)
+            self._translator_cache[key] = translator
+        return translator
+    
     def _translate_deepl(self, text, source_lang, target_lang):
         """Translate using DeepL API"""
         # This requires DeepL API key and deepl package
@@ -115,17 +180,50 @@ class TranslationService:
             else:
                 raise ValueError(f"Formato non supportato: {input_path.suffix}")
             
-            total = len(segments)
-            log(f"Trovati {total} segmenti da tradurre")
+            log(f"Trovati {len(segments)} segmenti da tradurre")
             
-            # Translate each segment
+            # Group repeated lines so each distinct text is translated once
+            unique_texts = {}
             for idx, segment in enumerate(segments):
-                log(f"Traduzione segmento {idx + 1}/{total}...")
-                segment['text'] = self.translate_text(
-                    segment['text'],
-                    source_lang,
-                    target_lang
+                unique_texts.setdefault(segment['text'], []).append(idx)
+            
+            total = len(unique_texts)
+            if total < len(segments):
+                log(f"{len(segments) - total} segmenti duplicati, tradotti una sola volta")
+            
+            if self.service == 'google' and self.google_backend == 'httpx':
+                # Send all distinct texts concurrently over one pooled connection
+                log(f"Traduzione di {total} segmenti in parallelo...")
+                
+                def line_progress(done, total_lines):
+                    log(f"Traduzione riga {done}/{total_lines}...")
+                
+                batch_service = AsyncTranslationService()
+                translated_texts = batch_service.translate_batch(
+                    list(unique_texts), source_lang, target_lang, line_progress
                 )
+                
+                # Failed lines come back untranslated: only a few are tolerated
+                failed = batch_service.failed_lines
+                if failed:
+                    message = f"{failed}/{batch_service.total_lines} righe non tradotte"
+                    if failed > batch_service.total_lines * MAX_FAILED_LINE_RATIO:
+                        raise TranslationError(
+                            f"Traduzione non riuscita: {message} "
+                            f"(servizio non raggiungibile o limite di richieste superato)"
+                        )
+                    log(f"⚠️ {message}, lasciate in lingua originale")
+                
+                for indices, translated in zip(unique_texts.values(), translated_texts):
+                    for idx in indices:
+                        segments[idx]['text'] = translated
+            else:
+                # Translate each distinct text and fan the result back out
+                for n, (text, indices) in enumerate(unique_texts.items(), start=1):
+                    log(f"Traduzione segmento {n}/{total}...")
+                    translated = self.translate_text(text, source_lang, target_lang)
+                    for idx in indices:
+                        segments[idx]['text'] = translated
             
             # Write translated file
             if output_path.suffix == '.srt':
@@ -147,21 +245,20 @@ class TranslationService:
         
         for block in blocks:
             lines = block.strip().split('\n')
-            if len(lines) >= 3:
-                try:
-                    index = int(lines[0])
-                    timecode = lines[1]
-                    start, end = timecode.split(' --> ')
-                    text = '\n'.join(lines[2:])
-                    
-                    segments.append({
-                        'index': index,
-                        'start': start.strip(),
-                        'end': end.strip(),
-                        'text': text
-                    })
-                except:
-                    pass
+            # Cheap structural checks instead of raising on malformed blocks
+            if len(lines) < 3:
+                continue
+            index = lines[0].strip()
+            if not (index.isascii() and index.isdigit()) or ' --> ' not in lines[1]:
+                continue
+            
+            start, _, end = lines[1].partition(' --> ')
+            segments.append({
+                'index': int(index),
+                'start': start.strip(),
+                'end': end.strip(),
+                'text': '\n'.join(lines[2:])
+            })
                     
         return segments
     
@@ -180,72 +277,173 @@ class TranslationService:
         
         for idx, block in enumerate(blocks, start=1):
             lines = block.strip().split('\n')
-            if len(lines) >= 2:
-                try:
-                    if '-->' in lines[0]:
-                        timecode = lines[0]
-                        text = '\n'.join(lines[1:])
-                    elif len(lines) >= 3 and '-->' in lines[1]:
-                        timecode = lines[1]
-                        text = '\n'.join(lines[2:])
-                    else:
-                        continue
-                    
-                    start, end = timecode.split(' --> ')
-                    
-                    segments.append({
-                        'index': idx,
-                        'start': start.strip(),
-                        'end': end.strip(),
-                        'text': text
-                    })
-                except:
-                    pass
+            if len(lines) < 2:
+                continue
+            
+            if ' --> ' in lines[0]:
+                timecode = lines[0]
+                text = '\n'.join(lines[1:])
+            elif len(lines) >= 3 and ' --> ' in lines[1]:
+                timecode = lines[1]
+                text = '\n'.join(lines[2:])
+            else:
+                continue
+            
+            start, _, end = timecode.partition(' --> ')
+            segments.append({
+                'index': idx,
+                'start': start.strip(),
+                'end': end.strip(),
+                'text': text
+            })
                     
         return segments
     
+    @staticmethod
+    def _iter_segment_blocks(segments):
+        """Yield one formatted subtitle block per segment"""
+        for segment in segments:
+            yield f"{segment['index']}\n{segment['start']} --> {segment['end']}\n{segment['text']}\n\n"
+    
     def _write_srt(self, segments, output_path):
         """Write SRT format"""
-        content = []
-        for segment in segments:
-            content.append(str(segment['index']))
-            content.append(f"{segment['start']} --> {segment['end']}")
-            content.append(segment['text'])
-            content.append('')
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(content))
+        with open(output_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            f.writelines(self._iter_segment_blocks(segments))
     
     def _write_vtt(self, segments, output_path):
         """Write VTT format"""
-        content = ['WEBVTT', '']
-        for segment in segments:
-            content.append(str(segment['index']))
-            content.append(f"{segment['start']} --> {segment['end']}")
-            content.append(segment['text'])
-            content.append('')
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(content))
+        with open(output_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            f.write('WEBVTT\n\n')
+            f.writelines(self._iter_segment_blocks(segments))
     
-    @staticmethod
-    def get_supported_languages():
+    @classmethod
+    def get_supported_languages(cls):
         """Get list of supported language codes"""
-        # Common language codes
-        return {
-            'en': 'English',
-            'it': 'Italiano', 
-            'es': 'Español',
-            'fr': 'Français',
-            'de': 'Deutsch',
-            'pt': 'Português',
-            'ru': 'Русский',
-            'ja': '日本語',
-            'zh-CN': '中文',
-            'ar': 'العربية',
-            'hi': 'हिन्दी',
-            'ko': '한국어',
-            'nl': 'Nederlands',
-            'pl': 'Polski',
-            'tr': 'Türkçe'
+        return cls._SUPPORTED_LANGUAGES
+
+
+class AsyncTranslationService:
+    """Concurrent Google translation over a single pooled HTTP client"""
+    
+    GOOGLE_URL = "https://translate.googleapis.com/translate_a/single"
+    
+    def __init__(self, max_concurrency=8, max_connections=32, timeout=15.0):
+        if not HTTPX_AVAILABLE:
+            raise ImportError("httpx package not installed")
+        
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections
+        self.timeout = timeout
+        
+        # Outcome of the last batch
+        self.total_lines = 0
+        self.failed_lines = 0
+    
+    def translate_batch(self, texts, source_lang, target_lang, progress_callback=None):
+        """
+        Translate a list of texts, blocking until all are done
+        
+        Must not be called from a thread that is already running an event
+        loop; use translate_batch_async there instead.
+        
+        Args:
+            texts: List of texts to translate
+            source_lang: Source language code
+            target_lang: Target language code
+            progress_callback: Called with (done, total) lines as they finish
+        
+        Returns:
+            List of translated texts, in the same order
+        """
+        return asyncio.run(self.translate_batch_async(texts, source_lang, target_lang,
+                                                      progress_callback))
+    
+    async def translate_batch_async(self, texts, source_lang, target_lang, progress_callback=None):
+        """
+        Translate a list of texts concurrently
+        
+        Lines are translated individually (like TranslationService) to
+        preserve subtitle structure; each distinct line is requested once.
+        Lines that still fail after retries are returned unchanged and
+        counted in failed_lines (out of total_lines).
+        
+        Args:
+            texts: List of texts to translate
+            source_lang: Source language code
+            target_lang: Target language code
+            progress_callback: Called with (done, total) lines as they finish
+        
+        Returns:
+            List of translated texts, in the same order
+        """
+        lines = {line for text in texts for line in text.split('\n') if line.strip()}
+        self.total_lines = len(lines)
+        self.failed_lines = 0
+        if not lines:
+            return list(texts)
+        
+        done = 0
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        limits = httpx.Limits(max_connections=self.max_connections)
+        
+        async with httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=limits,
+                                     timeout=self.timeout) as client:
+            
+            async def translate_line(line):
+                nonlocal done
+                async with semaphore:
+                    try:
+                        result = await self._translate_google(client, line, source_lang, target_lang)
+                    except Exception as e:
+                        logger.error(f"Translation error: {str(e)}")
+                        self.failed_lines += 1
+                        result = line  # Return original text on error
+                done += 1
+                if progress_callback:
+                    progress_callback(done, self.total_lines)
+                return result
+            
+            ordered = list(lines)
+            results = await asyncio.gather(*(translate_line(line) for line in ordered))
+        
+        translated = dict(zip(ordered, results))
+        return [
+            '\n'.join(translated.get(line, line) if line.strip() else '' for line in text.split('\n'))
+            for text in texts
+        ]
+    
+    async def _translate_google(self, client, text, source_lang, target_lang):
+        """
+        Translate one line using the public Google Translate endpoint
+        
+        Rate limiting (429), server errors (5xx) and network errors are
+        retried with exponential backoff, honouring Retry-After.
+        """
+        params = {
+            'client': 'gtx',
+            'sl': source_lang,
+            'tl': target_lang,
+            'dt': 't',
+            'q': text
         }
+        delay = GOOGLE_RETRY_BASE_DELAY
+        for attempt in range(GOOGLE_MAX_RETRIES + 1):
+            last_attempt = attempt == GOOGLE_MAX_RETRIES
+            try:
+                response = await client.get(self.GOOGLE_URL, params=params)
+            except httpx.TransportError:
+                if last_attempt:
+                    raise
+            else:
+                if (response.status_code != 429 and response.status_code < 500) or last_attempt:
+                    break
+                retry_after = response.headers.get('Retry-After', '')
+                if retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+            await asyncio.sleep(delay)
+            delay *= 2
+        response.raise_for_status()
+        
+        # Response: [[["translated chunk", "source chunk", ...], ...], ...]
+        chunks = response.json()[0] or []
+        return ''.join(chunk[0] for chunk in chunks if chunk and chunk[0])
@@ -2,8 +2,9 @@
 Audio extraction from video files using FFmpeg
 """
 import os
+import shutil
 import logging
-from pathlib import Path
+import functools
 import ffmpeg
 from .exceptions import AudioExtractionError
 
@@ -14,10 +15,12 @@ class AudioExtractor:
     """Extract audio from video files"""
     
     def __init__(self, temp_dir):
-        self.temp_dir = Path(temp_dir)
-        self.temp_dir.mkdir(exist_ok=True)
+        # Plain strings + os.path keep the per-file path handling cheap in batch mode
+        self.temp_dir = os.fspath(temp_dir)
+        os.makedirs(self.temp_dir, exist_ok=True)
     
-    def extract_audio(self, video_path, output_format="wav", sample_rate=16000):
+    def extract_audio(self, video_path, output_format="wav", sample_rate=16000, duration=None,
+                      audio_format=None):
         """
         Extract audio from video file
         
@@ -25,32 +28,43 @@ class AudioExtractor:
             video_path: Path to the video file
             output_format: Audio format (default: wav)
             sample_rate: Sample rate in Hz (default: 16000, optimal for Whisper)
+            duration: Only extract the first N seconds (optional)
+            audio_format: (codec, sample_rate, channels) of the video's first
+                audio stream, if already known (e.g. from VideoValidator);
+                a stream already in the target format is copied, not re-encoded
         
         Returns:
-            Path to the extracted audio file
+            Path to the extracted audio file (str)
         """
         try:
-            video_path = Path(video_path)
+            video_path = os.fspath(video_path)
             
-            if not video_path.exists():
+            if not os.path.exists(video_path):
                 raise FileNotFoundError(f"Video file not found: {video_path}")
             
             # Create output filename
-            audio_filename = f"{video_path.stem}_audio.{output_format}"
-            audio_path = self.temp_dir / audio_filename
+            video_name = os.path.basename(video_path)
+            stem = os.path.splitext(video_name)[0]
+            audio_path = os.path.join(self.temp_dir, f"{stem}_audio.{output_format}")
             
-            logger.info(f"Extracting audio from: {video_path.name}")
+            logger.info(f"Extracting audio from: {video_name}")
             
             # Extract audio using ffmpeg
-            stream = ffmpeg.input(str(video_path))
-            stream = ffmpeg.output(
-                stream,
-                str(audio_path),
-                acodec='pcm_s16le',
-                ac=1,  # mono
-                ar=str(sample_rate),
-                loglevel='error'
-            )
+            input_args = {'t': duration} if duration else {}
+            stream = ffmpeg.input(video_path, **input_args)
+            if output_format == "wav" and self._is_whisper_ready(audio_format, sample_rate):
+                # Already 16-bit mono PCM at the target rate: demux only
+                logger.debug("Audio already in target format, copying stream")
+                stream = ffmpeg.output(stream, audio_path, acodec='copy', loglevel='error')
+            else:
+                stream = ffmpeg.output(
+                    stream,
+                    audio_path,
+                    acodec='pcm_s16le',
+                    ac=1,  # mono
+                    ar=str(sample_rate),
+                    loglevel='error'
+                )
             
             # Overwrite if exists
             stream = ffmpeg.overwrite_output(stream)
@@ -58,7 +72,7 @@ class AudioExtractor:
             # Run the extraction
             ffmpeg.run(stream, capture_stdout=True, capture_stderr=True)
             
-            logger.info(f"Audio extracted successfully: {audio_path.name}")
+            logger.info(f"Audio extracted successfully: {os.path.basename(audio_path)}")
             return audio_path
             
         except ffmpeg.Error as e:
@@ -71,38 +85,42 @@ class AudioExtractor:
             logger.error(f"Error extracting audio: {str(e)}")
             raise AudioExtractionError(f"Errore imprevisto durante l'estrazione audio: {str(e)}") from e
     
+    def _is_whisper_ready(self, audio_format, sample_rate):
+        """Check if a known audio format is already pcm_s16le mono at sample_rate"""
+        if not audio_format:
+            return False
+        codec, source_rate, channels = audio_format
+        try:
+            return (codec == 'pcm_s16le'
+                    and int(source_rate) == sample_rate
+                    and int(channels) == 1)
+        except (TypeError, ValueError):
+            return False
+    
     def cleanup_temp_audio(self, audio_path):
         """Remove temporary audio file"""
         try:
-            audio_path = Path(audio_path)
-            if audio_path.exists():
-                audio_path.unlink()
-                logger.info(f"Temporary audio file removed: {audio_path.name}")
+            if os.path.exists(audio_path):
+                os.unlink(audio_path)
+                logger.info(f"Temporary audio file removed: {os.path.basename(audio_path)}")
         except Exception as e:
             logger.warning(f"Could not remove temp file {audio_path}: {str(e)}")
     
     def cleanup_all(self):
         """Remove all temporary audio files"""
+        count = 0
         try:
-            for audio_file in self.temp_dir.glob("*_audio.*"):
-                audio_file.unlink()
-                logger.info(f"Removed: {audio_file.name}")
+            with os.scandir(self.temp_dir) as entries:
+                for entry in entries:
+                    if '_audio.' in entry.name and entry.is_file():
+                        os.unlink(entry.path)
+                        count += 1
+            logger.info(f"Removed {count} temporary audio files")
         except Exception as e:
             logger.warning(f"Error during cleanup: {str(e)}")
 
 
+@functools.lru_cache(maxsize=1)
 def check_ffmpeg_installed():
-    """Check if FFmpeg is installed and accessible"""
-    try:
-        ffmpeg.probe("", cmd='ffmpeg')
-        return True
-    except:
-        try:
-            # Try running ffmpeg directly
-            import subprocess
-            subprocess.run(['ffmpeg', '-version'], 
-                         capture_output=True, 
-                         check=True)
-            return True
-        except:
-            return False
+    """Check if FFmpeg is installed and accessible (result is cached)"""
+    return shutil.which('ffmpeg') is not None
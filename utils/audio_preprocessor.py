@@ -1,13 +1,27 @@
 """
 Audio preprocessing utilities for improved sync accuracy
 """
+import os
+import re
+import json
 import logging
 import subprocess
 from pathlib import Path
 import tempfile
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Matches "silence_start: 12.34" / "silence_end: 15.6" in silencedetect output
+_SILENCE_RE = re.compile(r'silence_(start|end): (-?[\d.]+)')
+
+# No banner or progress lines: callers only need stderr when something fails
+_QUIET_ARGS = ['-hide_banner', '-nostats', '-loglevel', 'error']
+
+# Let FFmpeg spread the CPU-bound filters (loudnorm, EQ, compressor) over all cores
+_CPU_COUNT = str(os.cpu_count() or 1)
+_THREAD_ARGS = ['-filter_threads', _CPU_COUNT, '-filter_complex_threads', _CPU_COUNT]
+
 
 class AudioPreprocessor:
     """Preprocess audio for better synchronization accuracy"""
@@ -15,7 +29,271 @@ class AudioPreprocessor:
     def __init__(self):
         pass
     
-    def preprocess_for_sync(self, audio_path, output_path=None):
+    def silence_filter(self, threshold_db=-50, min_silence_duration=0.1, detection=None):
+        """
+        Build the silenceremove filter snippet
+        
+        Args:
+            threshold_db: Silence threshold in dB
+            min_silence_duration: Minimum silence duration to remove (seconds)
+            detection: Optional detection mode ('peak' or 'rms')
+        
+        Returns:
+            FFmpeg filter string
+        """
+        snippet = (f"silenceremove=start_periods=1:start_duration={min_silence_duration}"
+                   f":start_threshold={threshold_db}dB")
+        if detection:
+            snippet += f":detection={detection}"
+        return snippet
+    
+    def normalize_filter(self, measured=None):
+        """
+        Build the loudnorm (EBU R128) filter snippet
+        
+        Without measurements loudnorm runs in single-pass dynamic mode, which
+        is accurate enough for sync/transcription and needs only one decode.
+        
+        Args:
+            measured: Optional dict from measure_loudness() for a precise
+                second-pass (linear) normalization
+        
+        Returns:
+            FFmpeg filter string
+        """
+        snippet = "loudnorm=I=-16:LRA=11:TP=-1.5"
+        if measured:
+            snippet += (f":measured_I={measured['input_i']}"
+                        f":measured_LRA={measured['input_lra']}"
+                        f":measured_TP={measured['input_tp']}"
+                        f":measured_thresh={measured['input_thresh']}"
+                        f":offset={measured['target_offset']}"
+                        ":linear=true")
+        return snippet
+    
+    def measure_loudness(self, audio_path):
+        """
+        Run loudnorm's analysis pass and return its measurements
+        
+        Args:
+            audio_path: Input audio file
+        
+        Returns:
+            Dictionary with loudnorm measurements, or None on failure
+        """
+        cmd = [
+            'ffmpeg', '-nostdin', '-hide_banner', '-nostats',
+            '-i', str(audio_path),
+            '-af', self.normalize_filter() + ":print_format=json",
+            '-f', 'null',
+            '-'
+        ]
+        
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=180)
+        
+        if result.returncode != 0:
+            logger.warning("Loudness measurement failed")
+            return None
+        
+        # loudnorm prints its JSON summary as the last block on stderr
+        start = result.stderr.rfind('{')
+        end = result.stderr.rfind('}')
+        if start == -1 or end < start:
+            return None
+        
+        try:
+            return json.loads(result.stderr[start:end + 1])
+        except ValueError:
+            return None
+    
+    def speech_filter(self, lowpass=True):
+        """
+        Build the speech enhancement filter snippet (300Hz - 3400Hz range)
+        
+        Args:
+            lowpass: Also cut very high frequencies
+        
+        Returns:
+            FFmpeg filter string
+        """
+        filters = ["highpass=f=80"]  # Remove very low frequencies
+        if lowpass:
+            filters.append("lowpass=f=8000")  # Remove very high frequencies
+        filters.append("equalizer=f=1000:width_type=h:width=2000:g=3")  # Boost speech range
+        return ",".join(filters)
+    
+    def compressor_filter(self):
+        """Build the dynamic compression filter snippet"""
+        return "acompressor=threshold=-20dB:ratio=4:attack=5:release=50"
+    
+    def probe_audio_format(self, audio_path):
+        """
+        Read codec, sample rate and channel count of the first audio stream
+        
+        Args:
+            audio_path: Path to audio file
+        
+        Returns:
+            Dictionary with 'codec', 'sample_rate' and 'channels' (empty on failure)
+        """
+        cmd = [
+            'ffprobe', '-v', 'error',
+            '-select_streams', 'a:0',
+            '-show_entries', 'stream=codec_name,sample_rate,channels',
+            '-of', 'json',
+            str(audio_path)
+        ]
+        
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            if result.returncode != 0:
+                return {}
+            
+            streams = json.loads(result.stdout).get('streams') or [{}]
+            stream = streams[0]
+            return {
+                'codec': stream.get('codec_name'),
+                'sample_rate': int(stream.get('sample_rate', 0)),
+                'channels': int(stream.get('channels', 0))
+            }
+        except Exception as e:
+            logger.debug(f"Could not probe audio format: {str(e)}")
+            return {}
+    
+    def apply_filters(self, audio_path, output_path, filter_snippets,
+                      sample_rate=None, channels=None, duration=None, timeout=180):
+        """
+        Apply several filters with a single FFmpeg invocation
+        
+        All snippets are joined into one filtergraph, so the audio is decoded
+        and encoded only once regardless of how many filters are applied.
+        
+        Args:
+            audio_path: Input audio file
+            output_path: Output audio file
+            filter_snippets: List of FFmpeg filter strings
+            sample_rate: Output sample rate (optional)
+            channels: Output channel count (optional)
+            duration: Only read the first N seconds of input (optional)
+            timeout: FFmpeg timeout in seconds
+        
+        Returns:
+            Path to processed audio, or None if FFmpeg failed
+        """
+        filter_chain = ",".join(f for f in filter_snippets if f)
+        
+        if (sample_rate or channels) and not filter_chain:
+            # Skip the resampler/downmix when the input already matches (only
+            # without filters: loudnorm, for one, outputs 192kHz)
+            current = self.probe_audio_format(audio_path)
+            if current.get('sample_rate') == sample_rate:
+                sample_rate = None
+            if current.get('channels') == channels:
+                channels = None
+        
+        cmd = ['ffmpeg', '-nostdin'] + _QUIET_ARGS + _THREAD_ARGS
+        if duration:
+            # Input option: FFmpeg stops reading after N seconds
+            cmd += ['-t', str(duration)]
+        cmd += ['-i', str(audio_path)]
+        if filter_chain:
+            cmd += ['-af', filter_chain]
+        cmd += ['-threads', '0']
+        if str(output_path).lower().endswith('.wav'):
+            cmd += ['-f', 'wav', '-acodec', 'pcm_s16le']
+        if sample_rate:
+            cmd += ['-ar', str(sample_rate)]
+        if channels:
+            cmd += ['-ac', str(channels)]
+        cmd += ['-y', str(output_path)]
+        
+        logger.debug(f"Running FFmpeg with filters: {filter_chain}")
+        
+        # Only errors reach stderr, so it stays small; decode it only on failure
+        result = subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                stderr=subprocess.PIPE, timeout=timeout)
+        
+        if result.returncode != 0:
+            stderr = result.stderr.decode('utf-8', errors='replace')
+            logger.error(f"FFmpeg filtering failed: {stderr}")
+            return None
+        
+        return Path(output_path)
+    
+    def trim_audio(self, audio_path, duration, output_path=None):
+        """
+        Keep only the first seconds of an audio file as 16kHz mono WAV
+        
+        Args:
+            audio_path: Input audio file
+            duration: Seconds to keep
+            output_path: Output audio file (optional, temp file by default)
+        
+        Returns:
+            Path to trimmed audio, or the original path on failure
+        """
+        try:
+            if not output_path:
+                fd, output_path = tempfile.mkstemp(suffix="_trimmed.wav")
+                os.close(fd)
+            
+            if self.apply_filters(audio_path, output_path, [], sample_rate=16000,
+                                  channels=1, duration=duration) is None:
+                logger.warning("Audio trim failed, using full audio")
+                Path(output_path).unlink(missing_ok=True)
+                return audio_path
+            
+            return Path(output_path)
+            
+        except Exception as e:
+            logger.error(f"Error trimming audio: {str(e)}")
+            return audio_path
+    
+    def filter_to_array(self, audio_path, filter_snippets, sample_rate=16000,
+                        duration=None, timeout=300):
+        """
+        Apply filters and decode the result straight into memory
+        
+        FFmpeg writes raw float32 mono PCM to stdout, so no intermediate
+        WAV has to be written and decoded again by the consumer (Whisper
+        accepts the array directly).
+        
+        Args:
+            audio_path: Input audio file
+            filter_snippets: List of FFmpeg filter strings
+            sample_rate: Output sample rate
+            duration: Only read the first N seconds of input (optional)
+            timeout: FFmpeg timeout in seconds
+        
+        Returns:
+            numpy float32 array, or None if FFmpeg failed
+        """
+        filter_chain = ",".join(f for f in filter_snippets if f)
+        
+        
+        cmd = ['ffmpeg', '-nostdin'] + _QUIET_ARGS + _THREAD_ARGS
+        if duration:
+            cmd += ['-t', str(duration)]
+        cmd += ['-i', str(audio_path)]
+        if filter_chain:
+            cmd += ['-af', filter_chain]
+        cmd += ['-threads', '0', '-f', 'f32le', '-acodec', 'pcm_f32le',
+                '-ac', '1', '-ar', str(sample_rate), 'pipe:1']
+        
+        logger.debug(f"Decoding to memory with filters: {filter_chain}")
+        
+        result = subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, timeout=timeout)
+        
+        if result.returncode != 0:
+            stderr = result.stderr.decode('utf-8', errors='replace')
+            logger.error(f"FFmpeg decoding failed: {stderr}")
+            return None
+        
+        # Copy so consumers get a writable array
+        return np.frombuffer(result.stdout, dtype=np.float32).copy()
+    
+    def preprocess_for_sync(self, audio_path, output_path=None, max_duration=None, as_array=False):
         """
         Preprocess audio for better sync detection
         
@@ -28,11 +306,29 @@ class AudioPreprocessor:
         Args:
             audio_path: Input audio file path
             output_path: Output audio file path (optional)
+            max_duration: Only process the first N seconds (optional)
+            as_array: Return a 16kHz mono float32 numpy array instead of
+                writing a file (None on failure)
         
         Returns:
             Path to preprocessed audio file
         """
+        # Build FFmpeg filter chain
+        filters = [
+            self.silence_filter(),             # 1. Remove silence from start
+            self.normalize_filter(),           # 2. Normalize audio (make volume consistent)
+            self.speech_filter(lowpass=False), # 3-4. Remove rumble, enhance speech frequencies
+            self.compressor_filter(),          # 5. Dynamic audio compression for better consistency
+        ]
+        
         try:
+            if as_array:
+                logger.info("Preprocessing audio for better sync accuracy...")
+                audio = self.filter_to_array(audio_path, filters, duration=max_duration)
+                if audio is not None:
+                    logger.info(f"✓ Audio preprocessed in memory ({len(audio) / 16000:.0f}s)")
+                return audio
+            
             audio_path = Path(audio_path)
             
             if not output_path:
@@ -42,48 +338,13 @@ class AudioPreprocessor:
             
             logger.info("Preprocessing audio for better sync accuracy...")
             
-            # Build FFmpeg filter chain
-            filters = []
-            
-            # 1. Remove silence from start (detect silence threshold)
-            filters.append("silenceremove=start_periods=1:start_duration=0.1:start_threshold=-50dB")
-            
-            # 2. Normalize audio (make volume consistent)
-            filters.append("loudnorm=I=-16:LRA=11:TP=-1.5")
-            
-            # 3. High-pass filter to remove very low frequencies (rumble, etc.)
-            filters.append("highpass=f=80")
-            
-            # 4. Enhance speech frequencies (300Hz - 3400Hz)
-            filters.append("equalizer=f=1000:width_type=h:width=2000:g=3")
-            
-            # 5. Dynamic audio compression for better consistency
-            filters.append("acompressor=threshold=-20dB:ratio=4:attack=5:release=50")
-            
-            filter_chain = ",".join(filters)
+            # 16kHz mono is sufficient for speech and easier to analyze
+            result = self.apply_filters(audio_path, output_path, filters,
+                                        sample_rate=16000, channels=1,
+                                        duration=max_duration,
+                                        timeout=300)  # 5 minute timeout
             
-            # Execute FFmpeg
-            cmd = [
-                'ffmpeg',
-                '-i', str(audio_path),
-                '-af', filter_chain,
-                '-ar', '16000',  # 16kHz sample rate (sufficient for speech)
-                '-ac', '1',       # Mono (easier to analyze)
-                '-y',             # Overwrite output
-                str(output_path)
-            ]
-            
-            logger.debug(f"Running FFmpeg with filters: {filter_chain}")
-            
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 minute timeout
-            )
-            
-            if result.returncode != 0:
-                logger.error(f"FFmpeg preprocessing failed: {result.stderr}")
+            if result is None:
                 # Return original if preprocessing fails
                 return audio_path
             
@@ -94,15 +355,18 @@ class AudioPreprocessor:
             
         except subprocess.TimeoutExpired:
             logger.error("Audio preprocessing timed out")
-            return audio_path
+            return None if as_array else audio_path
         except Exception as e:
             logger.error(f"Error preprocessing audio: {str(e)}")
-            return audio_path
+            return None if as_array else audio_path
     
     def remove_silence(self, audio_path, output_path=None, threshold_db=-40, min_silence_duration=0.5):
         """
         Remove silence from audio file
         
+        To combine with other filters in one pass, use silence_filter()
+        with apply_filters() instead.
+        
         Args:
             audio_path: Input audio file
             output_path: Output audio file (optional)
@@ -122,18 +386,9 @@ class AudioPreprocessor:
             
             logger.info(f"Removing silence (threshold: {threshold_db}dB)...")
             
-            # FFmpeg silenceremove filter
-            cmd = [
-                'ffmpeg',
-                '-i', str(audio_path),
-                '-af', f'silenceremove=start_periods=1:start_duration={min_silence_duration}:start_threshold={threshold_db}dB:detection=peak',
-                '-y',
-                str(output_path)
-            ]
+            snippet = self.silence_filter(threshold_db, min_silence_duration, detection='peak')
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=180)
-            
-            if result.returncode != 0:
+            if self.apply_filters(audio_path, output_path, [snippet]) is None:
                 logger.warning(f"Silence removal failed, using original audio")
                 return audio_path
             
@@ -144,13 +399,18 @@ class AudioPreprocessor:
             logger.error(f"Error removing silence: {str(e)}")
             return audio_path
     
-    def normalize_audio(self, audio_path, output_path=None):
+    def normalize_audio(self, audio_path, output_path=None, two_pass=False):
         """
         Normalize audio levels for consistent volume
         
+        Uses single-pass dynamic loudnorm by default. Pass two_pass=True
+        only when R128-accurate output is required: it decodes the file
+        twice (measurement + apply).
+        
         Args:
             audio_path: Input audio file
             output_path: Output audio file (optional)
+            two_pass: Measure loudness first for precise normalization
         
         Returns:
             Path to normalized audio
@@ -165,19 +425,11 @@ class AudioPreprocessor:
             
             logger.info("Normalizing audio levels...")
             
-            # Use loudnorm filter for EBU R128 normalization
-            cmd = [
-                'ffmpeg',
-                '-i', str(audio_path),
-                '-af', 'loudnorm=I=-16:TP=-1.5:LRA=11',
-                '-ar', '16000',
-                '-y',
-                str(output_path)
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=180)
+            measured = self.measure_loudness(audio_path) if two_pass else None
             
-            if result.returncode != 0:
+            # Use loudnorm filter for EBU R128 normalization
+            if self.apply_filters(audio_path, output_path, [self.normalize_filter(measured)],
+                                  sample_rate=16000) is None:
                 logger.warning(f"Audio normalization failed")
                 return audio_path
             
@@ -209,26 +461,7 @@ class AudioPreprocessor:
             
             logger.info("Enhancing speech frequencies...")
             
-            # Apply filters to enhance speech (300Hz - 3400Hz range)
-            filters = [
-                "highpass=f=80",  # Remove very low frequencies
-                "lowpass=f=8000",  # Remove very high frequencies
-                "equalizer=f=1000:width_type=h:width=2000:g=3"  # Boost speech range
-            ]
-            
-            filter_chain = ",".join(filters)
-            
-            cmd = [
-                'ffmpeg',
-                '-i', str(audio_path),
-                '-af', filter_chain,
-                '-y',
-                str(output_path)
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=180)
-            
-            if result.returncode != 0:
+            if self.apply_filters(audio_path, output_path, [self.speech_filter()]) is None:
                 logger.warning(f"Speech enhancement failed")
                 return audio_path
             
@@ -287,8 +520,9 @@ class AudioPreprocessor:
         try:
             logger.info("Detecting silence periods...")
             
+            # silencedetect reports at info level, so only drop banner/progress
             cmd = [
-                'ffmpeg',
+                'ffmpeg', '-nostdin', '-hide_banner', '-nostats',
                 '-i', str(audio_path),
                 '-af', f'silencedetect=n={threshold_db}dB:d=0.5',
                 '-f', 'null',
@@ -297,24 +531,16 @@ class AudioPreprocessor:
             
             result = subprocess.run(cmd, capture_output=True, text=True, timeout=180)
             
-            # Parse silence detection output
+            # Parse silence detection output in a single scan
             silence_periods = []
-            lines = result.stderr.split('\n')
-            
             silence_start = None
-            for line in lines:
-                if 'silence_start' in line:
-                    try:
-                        silence_start = float(line.split('silence_start: ')[1].split()[0])
-                    except:
-                        pass
-                elif 'silence_end' in line and silence_start is not None:
-                    try:
-                        silence_end = float(line.split('silence_end: ')[1].split()[0])
-                        silence_periods.append((silence_start, silence_end))
-                        silence_start = None
-                    except:
-                        pass
+            for match in _SILENCE_RE.finditer(result.stderr):
+                kind, value = match.group(1), float(match.group(2))
+                if kind == 'start':
+                    silence_start = value
+                elif silence_start is not None:
+                    silence_periods.append((silence_start, value))
+                    silence_start = None
             
             logger.info(f"Detected {len(silence_periods)} silence periods")
             return silence_periods
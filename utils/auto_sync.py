@@ -1,7 +1,13 @@
 """
 Automatic subtitle synchronization using audio analysis
 """
+import gc
+import os
+import re
+import hashlib
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from pathlib import Path
 import subprocess
@@ -9,6 +15,17 @@ import json
 
 logger = logging.getLogger(__name__)
 
+# Fast JSON for the speech cache, stdlib fallback (both work on bytes)
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+    
+    def _json_dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+
 
 # Synchronization constants
 MIN_SEGMENT_DURATION = 0.3  # Minimum segment duration in seconds to filter noise
@@ -17,15 +34,345 @@ MAX_SEGMENT_DISTANCE = 2.0  # Maximum distance in seconds for segment matching
 MIN_MATCH_RATIO = 0.5  # Minimum ratio of matched segments for valid offset
 SYNC_THRESHOLD = 0.5  # Threshold in seconds to consider subtitles synced
 OFFSET_PRECISION = 0.05  # Rounding precision for final offset
+OFFSET_SEARCH_CHUNK = 64  # Candidate offsets scored per vectorized step
+EARLY_EXIT_SCORE = 0.05  # Stop searching once mean distance drops below this
+CONFIDENT_SCORE = 0.1  # Method 2 score considered an unambiguous lock
+CONFIDENT_AGREEMENT = 2.0  # Max disagreement (s) between methods 1 and 2 for a lock
+
+# Seconds of audio auto_sync_subtitles extracts and analyzes
+SYNC_ANALYSIS_SECONDS = 300
+
+# Sync cache settings
+SYNC_CACHE_MAX_ENTRIES = 20  # Least recently used entries beyond this are evicted
+SYNC_CACHE_MAX_BYTES = 256 * 1024 * 1024  # ...as are those beyond this total size
+SYNC_CACHE_HASH_BYTES = 8 * 1024 * 1024  # Bytes hashed from the start of each file
+
+# Parsed subtitle timings: one record per cue, column access via times['start']
+SUBTITLE_TIME_DTYPE = np.dtype([('start', np.float64), ('end', np.float64)])
+
+# SRT timing line (anything after the end timestamp is ignored)
+_TS_RE = re.compile(r'(\d{2}):(\d{2}):(\d{2}),(\d{3}) --> (\d{2}):(\d{2}):(\d{2}),(\d{3})')
+# Formatting to strip from subtitle text: <tags>, {styles}, [notes]/(notes)
+_FORMATTING_RE = re.compile(r'<[^>]+>|\{[^\}]+\}|[\[\(].*?[\]\)]')
+
+# Filename patterns for video type detection
+_TV_RE = re.compile(r'(?<![a-z0-9])(?:s\d{1,2}(?:e\d{1,3})?|season|episode|ep\d*|e\d{1,3})(?![a-z])')
+_DOCUMENTARY_RE = re.compile(r'docum|natgeo|bbc|discovery')
+
+
+def _iter_srt_blocks(path):
+    """Yield SRT blocks as lists of lines, reading one line at a time"""
+    buf = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                buf.append(line.rstrip('\n'))
+            elif buf:
+                yield buf
+                buf = []
+        if buf:
+            yield buf
+
+
+class WhisperManager:
+    """
+    Process-wide cache of the Whisper model used for speech detection
+    
+    Prefers faster-whisper (CTranslate2, int8 on CPU) and falls back to
+    openai-whisper when it is not installed.
+    """
+    
+    _model = None
+    _model_size = None
+    _backend = None
+    _device = None
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def _cuda_available():
+        """Check for a usable CUDA device via torch or CTranslate2"""
+        try:
+            import torch
+            return torch.cuda.is_available()
+        except ImportError:
+            pass
+        
+        try:
+            import ctranslate2
+            return ctranslate2.get_cuda_device_count() > 0
+        except ImportError:
+            return False
+    
+    @classmethod
+    def get_model(cls, size="base"):
+        """
+        Return the loaded Whisper model, loading it on first use
+        
+        Args:
+            size: Whisper model size
+        
+        Returns:
+            Loaded Whisper model
+        """
+        with cls._lock:
+            if cls._model is None or cls._model_size != size:
+                if cls._model is not None:
+                    cls._release()
+                
+                logger.info(f"Loading Whisper model for sync: {size}")
+                
+                # FP16 on GPU, int8 on CPU
+                device = "cuda" if cls._cuda_available() else "cpu"
+                try:
+                    from faster_whisper import WhisperModel
+                    compute_type = "float16" if device == "cuda" else "int8"
+                    cls._model = WhisperModel(size, device=device, compute_type=compute_type)
+                    cls._backend = "faster-whisper"
+                except ImportError:
+                    import whisper
+                    cls._model = whisper.load_model(size, device=device)
+                    cls._backend = "openai-whisper"
+                cls._model_size = size
+                cls._device = device
+                logger.info(f"Whisper sync backend: {cls._backend} on {device}")
+            
+            return cls._model
+    
+    @classmethod
+    def transcribe(cls, audio, size="base"):
+        """
+        Transcribe audio with the cached model
+        
+        Args:
+            audio: Path to audio file, or 16kHz mono float32 numpy array
+            size: Whisper model size
+        
+        Returns:
+            List of segments with 'start', 'end' and 'text' keys
+        """
+        model = cls.get_model(size)
+        
+        if cls._backend == "faster-whisper":
+            segments, _info = model.transcribe(
+                audio,
+                task="transcribe",
+                vad_filter=True,
+                word_timestamps=False  # Segment-level is more stable
+            )
+            return [{'start': seg.start, 'end': seg.end, 'text': seg.text} for seg in segments]
+        
+        result = model.transcribe(
+            audio,
+            task="transcribe",
+            language=None,
+            verbose=False,
+            fp16=cls._device == "cuda",
+            word_timestamps=False  # Segment-level is more stable
+        )
+        return result.get('segments', [])
+    
+    @classmethod
+    def unload(cls):
+        """Release the cached model and free its memory"""
+        with cls._lock:
+            cls._release()
+    
+    @classmethod
+    def _release(cls):
+        """Drop the model reference (caller must hold the lock)"""
+        if cls._model is None:
+            return
+        
+        cls._model = None
+        cls._model_size = None
+        cls._backend = None
+        cls._device = None
+        gc.collect()
+        
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+        
+        logger.info("Whisper sync model unloaded")
+
+
+class VadManager:
+    """Process-wide cache of the Silero VAD model used for fast speech detection"""
+    
+    _model = None
+    _get_speech_timestamps = None
+    _lock = threading.Lock()
+    
+    @classmethod
+    def get_model(cls):
+        """
+        Return the Silero VAD model and its timestamp helper, loading on first use
+        
+        Returns:
+            Tuple of (model, get_speech_timestamps)
+        """
+        with cls._lock:
+            if cls._model is None:
+                import torch
+                logger.info("Loading Silero VAD model...")
+                model, vad_utils = torch.hub.load('snakers4/silero-vad', 'silero_vad', trust_repo=True)
+                cls._model = model
+                cls._get_speech_timestamps = vad_utils[0]
+            
+            return cls._model, cls._get_speech_timestamps
+    
+    @classmethod
+    def detect(cls, audio_path, max_duration=None):
+        """
+        Detect speech segments with Silero VAD
+        
+        Args:
+            audio_path: Path to audio file
+            max_duration: Only analyze the first N seconds (optional)
+        
+        Returns:
+            List of segments with 'start', 'end' and empty 'text', or None
+            if VAD is not available
+        """
+        try:
+            import torch
+            from utils.audio_preprocessor import AudioPreprocessor
+            model, get_speech_timestamps = cls.get_model()
+        except Exception as e:
+            logger.warning(f"Silero VAD not available, using Whisper: {str(e)}")
+            return None
+        
+        audio = AudioPreprocessor().filter_to_array(audio_path, [], duration=max_duration)
+        if audio is None:
+            return None
+        
+        stamps = get_speech_timestamps(torch.from_numpy(audio), model,
+                                       sampling_rate=16000, min_speech_duration_ms=300)
+        return [{'start': s['start'] / 16000, 'end': s['end'] / 16000, 'text': ''} for s in stamps]
 
 
 class AutoSync:
     """Automatically synchronize subtitles with video audio"""
     
-    def __init__(self):
-        pass
+    def __init__(self, cache_dir=None):
+        """
+        Args:
+            cache_dir: Directory for cached audio and transcripts
+                (default: <CACHE_DIR>/sync)
+        """
+        if cache_dir is None:
+            import config
+            cache_dir = config.CACHE_DIR / "sync"
+        
+        self.cache_dir = Path(cache_dir)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            logger.warning(f"Sync cache disabled: {str(e)}")
+            self.cache_dir = None
+    
+    def _file_key(self, path, *extra):
+        """Build a cache key from the head of a file, its size and extra values"""
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            digest.update(f.read(SYNC_CACHE_HASH_BYTES))
+        digest.update(str(os.path.getsize(path)).encode())
+        for value in extra:
+            digest.update(f"|{value}".encode())
+        return digest.hexdigest()
+    
+    def _cache_lookup(self, filename):
+        """Return the cached file path if present (and mark it recently used)"""
+        if self.cache_dir is None:
+            return None
+        
+        path = self.cache_dir / filename
+        if not path.exists():
+            return None
+        
+        try:
+            os.utime(path)
+        except OSError as e:
+            # Read-only cache: still usable, just no LRU refresh
+            logger.debug(f"Could not touch cache entry: {str(e)}")
+        return path
+    
+    def _evict_cache(self):
+        """Keep the most recently used files, up to SYNC_CACHE_MAX_ENTRIES and SYNC_CACHE_MAX_BYTES"""
+        try:
+            with os.scandir(self.cache_dir) as it:
+                entries = [(entry.path, entry.stat()) for entry in it if entry.is_file()]
+            entries.sort(key=lambda e: e[1].st_mtime, reverse=True)
+            total_bytes = 0
+            for index, (path, st) in enumerate(entries):
+                total_bytes += st.st_size
+                if index >= SYNC_CACHE_MAX_ENTRIES or total_bytes > SYNC_CACHE_MAX_BYTES:
+                    os.unlink(path)
+        except OSError as e:
+            logger.debug(f"Sync cache eviction failed: {str(e)}")
+    
+    def _load_cached_speech(self, key):
+        """Load cached speech timestamps, or None"""
+        path = self._cache_lookup(f"{key}.json")
+        if path is None:
+            return None
+        
+        try:
+            with open(path, 'rb') as f:
+                return _json_loads(f.read())
+        except (OSError, ValueError):
+            return None
     
-    def detect_speech_timestamps(self, audio_path, max_duration=300, use_preprocessing=True):
+    def _save_cached_speech(self, key, speech_times):
+        """Store speech timestamps in the cache"""
+        if self.cache_dir is None:
+            return
+        
+        try:
+            with open(self.cache_dir / f"{key}.json", 'wb') as f:
+                f.write(_json_dumps(speech_times))
+            self._evict_cache()
+        except (OSError, TypeError) as e:
+            logger.debug(f"Could not cache speech timestamps: {str(e)}")
+    
+    def _extract_audio_cached(self, video_path, max_duration=300):
+        """
+        Extract audio from a video, reusing a previous extraction if cached
+        
+        Only the analyzed window is extracted (and cached), not the whole
+        soundtrack.
+        
+        Args:
+            video_path: Path to video file
+            max_duration: Seconds of audio to extract (None for all)
+        
+        Returns:
+            Tuple of (audio_path, is_temporary); temporary files must be
+            removed by the caller
+        """
+        from utils.audio_extractor import AudioExtractor
+        import tempfile
+        
+        if self.cache_dir is not None:
+            key = self._file_key(video_path, max_duration)
+            cached = self._cache_lookup(f"{key}.wav")
+            if cached is not None:
+                logger.info("Using cached audio extraction")
+                return str(cached), False
+            
+            audio_path = AudioExtractor(self.cache_dir).extract_audio(video_path, duration=max_duration)
+            cached = self.cache_dir / f"{key}.wav"
+            os.replace(audio_path, cached)
+            self._evict_cache()
+            return str(cached), False
+        
+        audio_path = AudioExtractor(tempfile.gettempdir()).extract_audio(video_path, duration=max_duration)
+        return audio_path, True
+    
+    def detect_speech_timestamps(self, audio_path, max_duration=300, use_preprocessing=True, fast=False):
         """
         Detect speech timestamps in audio using Whisper with optional preprocessing
         
@@ -33,49 +380,63 @@ class AutoSync:
             audio_path: Path to audio file
             max_duration: Maximum duration to analyze (seconds)
             use_preprocessing: Apply audio preprocessing for better accuracy
+            fast: Use Silero VAD for speech boundaries only (no text, so no
+                text validation); falls back to Whisper if unavailable
         
         Returns:
             List of speech timestamps
         """
         try:
-            import whisper
             from utils.audio_preprocessor import AudioPreprocessor
             
-            logger.info("Detecting speech patterns in audio...")
-            
-            # Preprocess audio if enabled
-            processed_audio = audio_path
-            if use_preprocessing:
-                logger.info("Applying audio preprocessing for better accuracy...")
-                preprocessor = AudioPreprocessor()
-                processed_audio = preprocessor.preprocess_for_sync(audio_path)
-                logger.info("✓ Audio preprocessing completed")
+            # Same audio + same settings -> same transcript
+            cache_key = None
+            if self.cache_dir is not None:
+                cache_key = self._file_key(audio_path, max_duration, use_preprocessing,
+                                           "vad" if fast else "base")
+                cached = self._load_cached_speech(cache_key)
+                if cached:
+                    logger.info(f"Using cached speech detection ({len(cached)} segments)")
+                    return cached
             
-            logger.info("This may take 1-2 minutes for accurate analysis...")
-            
-            # Load base model for better accuracy (tiny was too imprecise)
-            model = whisper.load_model("base")
-            
-            # Transcribe with timestamps and word-level timing
-            result = model.transcribe(
-                str(processed_audio),
-                task="transcribe",
-                language=None,
-                verbose=False,
-                word_timestamps=False  # Segment-level is more stable
-            )
+            logger.info("Detecting speech patterns in audio...")
             
-            # Cleanup preprocessed file if different from original
-            if use_preprocessing and processed_audio != audio_path:
-                try:
-                    Path(processed_audio).unlink()
-                    logger.debug("Cleaned up preprocessed audio file")
-                except:
-                    pass
+            segments = None
+            if fast:
+                # Speech boundaries only: a tiny VAD model instead of full ASR
+                segments = VadManager.detect(audio_path, max_duration)
             
+            if segments is None:
+                # Preprocess audio if enabled; either way only the first
+                # max_duration seconds are handed to Whisper
+                preprocessor = AudioPreprocessor()
+                processed_audio = None
+                if use_preprocessing:
+                    # Preprocessed samples go straight to Whisper, no temp WAV
+                    logger.info("Applying audio preprocessing for better accuracy...")
+                    processed_audio = preprocessor.preprocess_for_sync(
+                        audio_path, max_duration=max_duration, as_array=True
+                    )
+                    if processed_audio is not None:
+                        logger.info("✓ Audio preprocessing completed")
+                
+                if processed_audio is None and max_duration:
+                    # Decode just the analyzed window straight to memory
+                    # instead of writing a trimmed WAV for Whisper to re-read
+                    processed_audio = preprocessor.filter_to_array(
+                        audio_path, [], duration=max_duration
+                    )
+                if processed_audio is None:
+                    processed_audio = str(audio_path)
+                
+                logger.info("This may take 1-2 minutes for accurate analysis...")
+                
+                # Base model for better accuracy (tiny was too imprecise), cached across syncs
+                segments = WhisperManager.transcribe(processed_audio, "base")
+                
             # Extract timestamps with filtering
             speech_times = []
-            for segment in result.get('segments', []):
+            for segment in segments:
                 # Filter out very short segments (likely noise)
                 duration = segment['end'] - segment['start']
                 if duration > MIN_SEGMENT_DURATION:
@@ -87,6 +448,9 @@ class AutoSync:
             
             logger.info(f"Detected {len(speech_times)} speech segments (filtered)")
             
+            if cache_key and speech_times:
+                self._save_cached_speech(cache_key, speech_times)
+            
             # Log first few for debugging
             if speech_times:
                 logger.info(f"First speech: {speech_times[0]['start']:.2f}s - '{speech_times[0]['text'][:30]}'")
@@ -99,13 +463,35 @@ class AutoSync:
             logger.error(f"Error detecting speech: {str(e)}")
             return []
     
-    def calculate_offset(self, subtitle_path, audio_path):
+    def calculate_offset(self, subtitle_path, audio_path, max_duration=300, fast=False):
         """
         Calculate optimal offset between subtitles and audio with text validation
         
         Args:
             subtitle_path: Path to subtitle file
             audio_path: Path to audio file
+            max_duration: Seconds of audio to analyze
+            fast: Detect speech with VAD instead of Whisper (no text validation)
+        
+        Returns:
+            Optimal offset in seconds
+        """
+        # Parse subtitle file (timestamps and text for validation)
+        subtitle_times, subtitle_texts = self._parse_subtitle(subtitle_path)
+        return self.calculate_offset_from_times(subtitle_times, subtitle_texts, audio_path,
+                                                max_duration, fast)
+    
+    def calculate_offset_from_times(self, subtitle_times, subtitle_texts, audio_path,
+                                    max_duration=300, fast=False):
+        """
+        Calculate optimal offset from already parsed subtitles
+        
+        Args:
+            subtitle_times: Subtitle timestamps from _parse_subtitle
+            subtitle_texts: Subtitle texts from _parse_subtitle
+            audio_path: Path to audio file
+            max_duration: Seconds of audio to analyze
+            fast: Detect speech with VAD instead of Whisper (no text validation)
         
         Returns:
             Optimal offset in seconds
@@ -113,22 +499,22 @@ class AutoSync:
         try:
             logger.info("Calculating optimal subtitle offset with text validation...")
             
-            # Parse subtitle file
-            subtitle_times = self._parse_subtitle_times(subtitle_path)
-            
-            if not subtitle_times:
+            if len(subtitle_times) == 0:
                 logger.warning("No subtitle times found")
                 return 0.0
             
             # Detect speech in audio WITH transcription for validation
-            speech_times = self.detect_speech_timestamps(audio_path)
+            speech_times = self.detect_speech_timestamps(audio_path, max_duration=max_duration, fast=fast)
             
             if not speech_times:
                 logger.warning("No speech detected in audio")
                 return 0.0
             
-            # Parse subtitle TEXT for validation
-            subtitle_texts = self._parse_subtitle_texts(subtitle_path)
+            # Only subtitles inside the analyzed audio window can match speech
+            if max_duration:
+                in_window = subtitle_times[subtitle_times['start'] < max_duration]
+                if len(in_window):
+                    subtitle_times = in_window
             
             # Find best offset by comparing patterns AND text
             offset = self._find_best_offset_with_validation(
@@ -161,10 +547,8 @@ class AutoSync:
             Tuple of (output_path, offset_applied, calibrated_offset)
         """
         try:
-            from utils.audio_extractor import AudioExtractor
             from utils.video_processor import VideoProcessor
             from utils.smart_sync import SmartSync
-            import tempfile
             
             subtitle_path = Path(subtitle_path)
             video_path = Path(video_path)
@@ -176,14 +560,20 @@ class AutoSync:
             
             logger.info("Starting automatic subtitle synchronization...")
             
-            # Extract audio from video
+            # Extract audio from video (reused from cache on repeated syncs);
+            # parse the subtitles while ffmpeg is running
             logger.info("Extracting audio for analysis...")
-            audio_extractor = AudioExtractor(tempfile.gettempdir())
-            audio_path = audio_extractor.extract_audio(video_path)
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                audio_future = executor.submit(self._extract_audio_cached, video_path,
+                                               SYNC_ANALYSIS_SECONDS)
+                subtitle_future = executor.submit(self._parse_subtitle, subtitle_path)
+                audio_path, audio_is_temp = audio_future.result()
+                subtitle_times, subtitle_texts = subtitle_future.result()
             
             try:
                 # Calculate raw offset
-                raw_offset = self.calculate_offset(subtitle_path, audio_path)
+                raw_offset = self.calculate_offset_from_times(subtitle_times, subtitle_texts, audio_path,
+                                                              SYNC_ANALYSIS_SECONDS)
                 
                 # Apply smart calibration if enabled
                 calibrated_offset = raw_offset
@@ -200,7 +590,7 @@ class AutoSync:
                     if should_adjust:
                         logger.info("=" * 60)
                         logger.info("💡 SUGGERIMENTO INTELLIGENTE:")
-                        logger.info(f"   Basato su {len(smart.calibration_data['corrections'])} sync precedenti")
+                        logger.info(f"   Basato su {smart.correction_count} sync precedenti")
                         logger.info(f"   Offset grezzo: {raw_offset:+.2f}s")
                         logger.info(f"   Offset calibrato: {calibrated_offset:+.2f}s")
                         logger.info(f"   Confidenza: {confidence*100:.0f}%")
@@ -224,7 +614,8 @@ class AutoSync:
                 
             finally:
                 # Cleanup temp audio
-                audio_extractor.cleanup_temp_audio(audio_path)
+                if audio_is_temp:
+                    Path(audio_path).unlink(missing_ok=True)
                 
         except Exception as e:
             logger.error(f"Error in auto-sync: {str(e)}")
@@ -234,76 +625,59 @@ class AutoSync:
         """Detect video type from filename"""
         filename_lower = filename.lower()
         
-        # TV series patterns
-        if any(pattern in filename_lower for pattern in ['s0', 's1', 's2', 'season', 'episode', 'ep', 'e0']):
+        # TV series patterns (S01E02, season, episode, ep04, ...)
+        if _TV_RE.search(filename_lower):
             return 'tv'
         
         # Documentary patterns
-        if any(pattern in filename_lower for pattern in ['documentary', 'docum', 'natgeo', 'bbc', 'discovery']):
+        if _DOCUMENTARY_RE.search(filename_lower):
             return 'documentary'
         
         # Default to movie
         return 'movie'
     
-    def _parse_subtitle_times(self, subtitle_path):
-        """Parse timestamps from subtitle file"""
+    def _parse_subtitle(self, subtitle_path):
+        """
+        Parse timestamps and texts from an SRT file in a single streaming pass
+        
+        Args:
+            subtitle_path: Path to subtitle file
+        
+        Returns:
+            Tuple of (times, texts) where times is a structured array with
+            'start'/'end' fields and texts the matching lowercased, tag-free texts
+        """
         try:
-            import re
-            
-            times = []
-            
-            with open(subtitle_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Find all timestamps (SRT format)
-            pattern = r'(\d{2}):(\d{2}):(\d{2}),(\d{3}) --> (\d{2}):(\d{2}):(\d{2}),(\d{3})'
-            matches = re.findall(pattern, content)
+            stamps = []
+            texts = []
             
-            for match in matches:
-                start_h, start_m, start_s, start_ms = map(int, match[:4])
-                end_h, end_m, end_s, end_ms = map(int, match[4:])
+            # Blocks are read lazily, so only one cue is held in memory at a time
+            for lines in _iter_srt_blocks(subtitle_path):
+                # Timing line is normally second (after the index), first if unnumbered
+                for i, line in enumerate(lines[:2]):
+                    match = _TS_RE.search(line)
+                    if match:
+                        break
+                else:
+                    continue
                 
-                start_time = start_h * 3600 + start_m * 60 + start_s + start_ms / 1000
-                end_time = end_h * 3600 + end_m * 60 + end_s + end_ms / 1000
+                stamps.append(match.groups())
                 
-                times.append({
-                    'start': start_time,
-                    'end': end_time
-                })
-            
-            return times
-            
-        except Exception as e:
-            logger.error(f"Error parsing subtitle times: {str(e)}")
-            return []
-    
-    def _parse_subtitle_texts(self, subtitle_path):
-        """Parse subtitle texts for validation"""
-        try:
-            import re
-            
-            texts = []
+                # Remove formatting
+                text = ' '.join(lines[i + 1:]).strip().lower()
+                texts.append(_FORMATTING_RE.sub('', text))
             
-            with open(subtitle_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            # Convert all h/m/s/ms columns at once (shape [N, 8])
+            parts = np.asarray(stamps, dtype=np.int32).reshape(-1, 8)
+            times = np.empty(len(parts), dtype=SUBTITLE_TIME_DTYPE)
+            times['start'] = parts[:, 0] * 3600 + parts[:, 1] * 60 + parts[:, 2] + parts[:, 3] / 1000
+            times['end'] = parts[:, 4] * 3600 + parts[:, 5] * 60 + parts[:, 6] + parts[:, 7] / 1000
             
-            blocks = content.strip().split('\n\n')
-            
-            for block in blocks:
-                lines = block.strip().split('\n')
-                if len(lines) >= 3:
-                    text = ' '.join(lines[2:]).strip().lower()
-                    # Remove formatting
-                    text = re.sub(r'<[^>]+>', '', text)
-                    text = re.sub(r'\{[^\}]+\}', '', text)
-                    text = re.sub(r'[\[\(].*?[\]\)]', '', text)
-                    texts.append(text)
-            
-            return texts
+            return times, texts
             
         except Exception as e:
-            logger.error(f"Error parsing subtitle texts: {str(e)}")
-            return []
+            logger.error(f"Error parsing subtitle file: {str(e)}")
+            return np.empty(0, dtype=SUBTITLE_TIME_DTYPE), []
     
     def _find_best_offset_with_validation(self, subtitle_times, speech_times, subtitle_texts):
         """Find best offset with text validation"""
@@ -311,23 +685,26 @@ class AutoSync:
         offset = self._find_best_offset(subtitle_times, speech_times)
         
         # Validate with text matching if available
-        if subtitle_texts and len(speech_times) > 0 and hasattr(speech_times[0], 'get'):
+        if subtitle_texts and len(speech_times) > 0 and speech_times[0].get('text'):
             try:
                 # Compare first few subtitle texts with speech transcriptions
-                matches = 0
                 total = min(5, len(subtitle_texts), len(speech_times))
                 
-                for i in range(total):
-                    sub_text = subtitle_texts[i]
-                    speech_text = speech_times[i].get('text', '').lower().strip()
-                    
-                    # Simple similarity check
-                    if len(sub_text) > 10 and len(speech_text) > 10:
-                        sub_words = set(sub_text.split()[:5])
-                        speech_words = set(speech_text.split()[:5])
-                        overlap = len(sub_words & speech_words)
-                        if overlap >= 2:
-                            matches += 1
+                # First words of each text, built once (None = too short to compare)
+                sub_words = [
+                    frozenset(text.split()[:5]) if len(text) > 10 else None
+                    for text in subtitle_texts[:total]
+                ]
+                speech_words = []
+                for speech in speech_times[:total]:
+                    text = speech.get('text', '').lower().strip()
+                    speech_words.append(frozenset(text.split()[:5]) if len(text) > 10 else None)
+                
+                # Simple similarity check
+                matches = sum(
+                    1 for a, b in zip(sub_words, speech_words)
+                    if a and b and len(a & b) >= 2
+                )
                 
                 confidence = matches / total if total > 0 else 0
                 logger.info(f"Text validation confidence: {confidence:.1%}")
@@ -392,7 +769,7 @@ class AutoSync:
         Uses multiple methods for maximum accuracy
         
         Args:
-            subtitle_times: List of subtitle timestamps
+            subtitle_times: Subtitle timestamps (SUBTITLE_TIME_DTYPE array)
             speech_times: List of detected speech timestamps
             max_offset: Maximum offset to try (seconds)
         
@@ -400,7 +777,7 @@ class AutoSync:
             Best offset in seconds
         """
         try:
-            if not subtitle_times or not speech_times:
+            if len(subtitle_times) == 0 or not speech_times:
                 return 0.0
             
             logger.info(f"Analyzing {len(subtitle_times)} subtitle segments vs {len(speech_times)} speech segments")
@@ -408,7 +785,7 @@ class AutoSync:
             # Use more segments for better accuracy
             sample_size = min(20, len(subtitle_times), len(speech_times))
             
-            sub_starts = np.array([s['start'] for s in subtitle_times[:sample_size]])
+            sub_starts = subtitle_times['start'][:sample_size]
             speech_starts = np.array([s['start'] for s in speech_times[:sample_size]])
             
             # METHOD 1: Direct alignment of first segments
@@ -430,47 +807,44 @@ class AutoSync:
                 logger.info(f"  → Perfect alignment!")
             
             # METHOD 2: Cross-correlation with multiple samples
-            best_offset = offset_method1
-            best_score = float('inf')
-            
             # Expand search range if first method suggests large offset
             search_range = max(max_offset, abs(offset_method1) + 10)
+            min_matches = sample_size * MIN_MATCH_RATIO
             
-            # Try offsets with defined resolution
-            test_offsets = np.arange(-search_range, search_range, OFFSET_SEARCH_RESOLUTION)
+            # Locate the correlation peak over all segments in the frequency
+            # domain, then refine it with distance scoring around the peak
+            fft_offset, fft_confidence = self._fft_correlate_offset(
+                subtitle_times, speech_times, search_range
+            )
+            logger.info(f"FFT correlation peak: {fft_offset:+.2f}s (overlap {fft_confidence:.0%})")
             
-            for offset in test_offsets:
-                # Calculate alignment score
-                score = 0
-                matched = 0
-                
-                for sub_start in sub_starts:
-                    adjusted_sub = sub_start + offset
-                    
-                    # Find closest speech segment
-                    if len(speech_starts) > 0:
-                        distances = np.abs(speech_starts - adjusted_sub)
-                        min_dist = np.min(distances)
-
-                        # Only count if within maximum distance
-                        if min_dist < MAX_SEGMENT_DISTANCE:
-                            score += min_dist
-                            matched += 1
-
-                # Penalize if too few matches
-                if matched < sample_size * MIN_MATCH_RATIO:
-                    score += 1000
-                else:
-                    score = score / matched  # Average distance
-                
-                if score < best_score:
-                    best_score = score
-                    best_offset = offset
+            test_offsets = np.arange(
+                fft_offset - MAX_SEGMENT_DISTANCE,
+                fft_offset + MAX_SEGMENT_DISTANCE,
+                OFFSET_SEARCH_RESOLUTION
+            )
+            best_offset, best_score = self._search_offsets(
+                sub_starts, speech_starts, test_offsets, min_matches, center=fft_offset
+            )
+            
+            if best_score >= 1000:
+                # Peak not confirmed by segment matching: scan the full range,
+                # starting from the first-segment estimate
+                test_offsets = np.arange(-search_range, search_range, OFFSET_SEARCH_RESOLUTION)
+                best_offset, best_score = self._search_offsets(
+                    sub_starts, speech_starts, test_offsets, min_matches, center=offset_method1
+                )
             
             logger.info(f"Method 2 (cross-correlation): offset = {best_offset:.2f}s, score = {best_score:.3f}")
             
+            # Methods 3 and 4 only resolve disagreement; skip them on a clear lock
+            confident = (best_score < CONFIDENT_SCORE
+                         and abs(best_offset - offset_method1) < CONFIDENT_AGREEMENT)
+            if confident:
+                logger.info(f"High confidence in offset: {best_offset:.2f}s (skipping validation methods)")
+            
             # METHOD 3: Gap pattern analysis
-            if len(sub_starts) > 3 and len(speech_starts) > 3:
+            if not confident and len(sub_starts) > 3 and len(speech_starts) > 3:
                 sub_gaps = np.diff(sub_starts)
                 speech_gaps = np.diff(speech_starts)
                 
@@ -493,7 +867,7 @@ class AutoSync:
                         logger.warning("Low correlation - subtitles might not match audio")
             
             # METHOD 4: Validate with middle and end segments
-            if len(subtitle_times) > 10 and len(speech_times) > 10:
+            if not confident and len(subtitle_times) > 10 and len(speech_times) > 10:
                 mid_sub = subtitle_times[len(subtitle_times)//2]['start']
                 mid_speech = speech_times[len(speech_times)//2]['start']
                 mid_offset = mid_speech - mid_sub
@@ -527,6 +901,117 @@ class AutoSync:
             logger.error(f"Error finding best offset: {str(e)}")
             return 0.0
     
+    def _score_offsets(self, sub_starts, speech_starts, test_offsets, min_matches):
+        """
+        Score candidate offsets by mean distance to the closest speech start
+        
+        Args:
+            sub_starts: Array of subtitle start times
+            speech_starts: Array of speech start times
+            test_offsets: Array of candidate offsets
+            min_matches: Minimum matched segments for a valid offset
+        
+        Returns:
+            Array of scores (lower is better, >= 1000 means too few matches)
+        """
+        # For each offset and subtitle, distance to the closest speech start
+        # (shape [offsets, subs])
+        adjusted = sub_starts[None, :] + test_offsets[:, None]
+        distances = np.abs(adjusted[:, :, None] - speech_starts[None, None, :]).min(axis=2)
+        
+        # Only count matches within maximum distance
+        within = distances < MAX_SEGMENT_DISTANCE
+        matched = within.sum(axis=1)
+        total_dist = np.where(within, distances, 0.0).sum(axis=1)
+        
+        # Penalize if too few matches, otherwise use average distance
+        return np.where(
+            matched < min_matches,
+            total_dist + 1000,
+            total_dist / np.maximum(matched, 1)
+        )
+    
+    def _search_offsets(self, sub_starts, speech_starts, test_offsets, min_matches, center):
+        """
+        Find the best scoring offset, closest candidates to center first
+        
+        Candidates are scored in vectorized chunks ordered by distance from
+        center; the search stops early once a near-perfect match is found.
+        
+        Returns:
+            Tuple of (best_offset, best_score)
+        """
+        ordered = test_offsets[np.argsort(np.abs(test_offsets - center), kind='stable')]
+        
+        best_offset = center
+        best_score = float('inf')
+        
+        for i in range(0, len(ordered), OFFSET_SEARCH_CHUNK):
+            chunk = ordered[i:i + OFFSET_SEARCH_CHUNK]
+            scores = self._score_offsets(sub_starts, speech_starts, chunk, min_matches)
+            idx = int(scores.argmin())
+            
+            if scores[idx] < best_score:
+                best_score = float(scores[idx])
+                best_offset = float(chunk[idx])
+            
+            if best_score < EARLY_EXIT_SCORE:
+                break
+        
+        return best_offset, best_score
+    
+    def _activity_signal(self, starts, ends, length):
+        """Rasterize segments into a 0/1 activity signal at OFFSET_SEARCH_RESOLUTION"""
+        start_idx = np.clip((starts / OFFSET_SEARCH_RESOLUTION).astype(np.int64), 0, length - 1)
+        end_idx = np.clip((ends / OFFSET_SEARCH_RESOLUTION).astype(np.int64) + 1, 0, length)
+        
+        edges = np.zeros(length + 1)
+        np.add.at(edges, start_idx, 1)
+        np.add.at(edges, end_idx, -1)
+        return (np.cumsum(edges[:length]) > 0).astype(np.float64)
+    
+    def _fft_correlate_offset(self, subtitle_times, speech_times, search_range):
+        """
+        Find the offset that maximizes subtitle/speech activity overlap
+        
+        Both timelines are binned into activity signals and cross-correlated
+        with an FFT, which is O(N log N) in the timeline length.
+        
+        Args:
+            subtitle_times: Subtitle timestamps (SUBTITLE_TIME_DTYPE array)
+            speech_times: List of detected speech timestamps
+            search_range: Maximum absolute offset (seconds)
+        
+        Returns:
+            Tuple of (offset, confidence) where confidence is the overlap at
+            the peak relative to the shorter total activity
+        """
+        sub_starts = subtitle_times['start']
+        sub_ends = subtitle_times['end']
+        speech_starts = np.array([s['start'] for s in speech_times])
+        speech_ends = np.array([s['end'] for s in speech_times])
+        
+        length = int(max(sub_ends.max(), speech_ends.max()) / OFFSET_SEARCH_RESOLUTION) + 2
+        sub_signal = self._activity_signal(sub_starts, sub_ends, length)
+        speech_signal = self._activity_signal(speech_starts, speech_ends, length)
+        
+        # Zero-padded circular correlation == linear correlation;
+        # corr[lag] = sum(speech[t] * sub[t - lag])
+        n = 1 << int(2 * length - 1).bit_length()
+        corr = np.fft.irfft(np.fft.rfft(speech_signal, n) * np.conj(np.fft.rfft(sub_signal, n)), n)
+        
+        # Lags beyond the timeline have no overlap, and past n - length they
+        # would wrap around onto real lags, so clamp the window to ±(length-1)
+        max_lag = min(int(search_range / OFFSET_SEARCH_RESOLUTION), length - 1)
+        lags = np.arange(-max_lag, max_lag + 1)
+        window = corr[lags % n]
+        peak = int(window.argmax())
+        
+        overlap = min(sub_signal.sum(), speech_signal.sum())
+        confidence = float(window[peak] / overlap) if overlap > 0 else 0.0
+        
+        return float(lags[peak] * OFFSET_SEARCH_RESOLUTION), confidence
+    
     def quick_sync_check(self, subtitle_path, video_path, sample_duration=60):
         """
         Quick check if subtitles are synchronized
@@ -547,11 +1032,13 @@ class AutoSync:
             
             # Extract short audio sample
             audio_extractor = AudioExtractor(tempfile.gettempdir())
-            audio_path = audio_extractor.extract_audio(video_path)
+            audio_path = audio_extractor.extract_audio(video_path, duration=sample_duration)
             
             try:
                 # Calculate offset
-                offset = self.calculate_offset(subtitle_path, audio_path)
+                # Offset only, no text validation needed: VAD is enough
+                offset = self.calculate_offset(subtitle_path, audio_path,
+                                               max_duration=sample_duration, fast=True)
                 
                 # Consider synced if offset is less than threshold
                 is_synced = abs(offset) < SYNC_THRESHOLD
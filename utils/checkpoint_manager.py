@@ -1,6 +1,8 @@
 """
 Checkpoint manager for saving and resuming long-running operations
 """
+import os
+import time
 import logging
 import json
 from pathlib import Path
@@ -8,6 +10,41 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Buffer size for checkpoint reads/writes
+CHECKPOINT_BUFFER_SIZE = 1024 * 1024
+# Seconds a directory listing is reused while the directory is unchanged
+LIST_CACHE_TTL = 2.0
+
+# Fast JSON for checkpoints, stdlib fallback (both work on bytes)
+try:
+    import orjson
+    _json_loads = orjson.loads
+    
+    def _json_dumps(obj):
+        # Non-str keys are coerced to strings, as stdlib json does
+        return orjson.dumps(obj, default=str,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    _json_loads = json.loads
+    
+    def _json_dumps(obj):
+        return json.dumps(obj, default=str).encode('utf-8')
+
+# Compact binary format for large checkpoints (JSON is kept as fallback)
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+
+def _msgpack_default(obj):
+    """Convert values msgpack cannot encode natively"""
+    # numpy arrays and scalars become plain lists/floats
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    return str(obj)
+
 
 class CheckpointManager:
     """Manage checkpoints for resumable operations"""
@@ -15,32 +52,104 @@ class CheckpointManager:
     def __init__(self, checkpoint_dir="checkpoints"):
         self.checkpoint_dir = Path(checkpoint_dir)
         self.checkpoint_dir.mkdir(exist_ok=True)
+        # Plain string prefix: checkpoint paths are built by concatenation
+        self._ckpt_dir_str = str(self.checkpoint_dir) + os.sep
+        # (directory signature, listing, monotonic time) of the last list_checkpoints scan
+        self._list_cache = None
         logger.info(f"CheckpointManager initialized: {self.checkpoint_dir}")
     
-    def save_checkpoint(self, operation_id, data, metadata=None):
+    def _path(self, operation_id):
+        """Return the checkpoint file path (str) for an operation"""
+        return self._ckpt_dir_str + operation_id + '.checkpoint'
+    
+    def _meta_path(self, operation_id):
+        """Return the metadata sidecar path (str) for an operation"""
+        return self._ckpt_dir_str + operation_id + '.meta.json'
+    
+    def _decode(self, payload, format=None):
+        """Decode a checkpoint payload in the given format (sniffed if None)"""
+        if format is None:
+            # JSON checkpoints start with '{', msgpack maps with a binary marker
+            format = 'json' if payload.lstrip()[:1] == b'{' else 'msgpack'
+        if format == 'json':
+            return _json_loads(payload)
+        return msgpack.unpackb(payload, raw=False)
+    
+    def _scan_checkpoints(self, directory=None, prefix=''):
+        """
+        Yield (operation_id, DirEntry) for every checkpoint, subfolders included
+        
+        Operation IDs of nested checkpoints are their path relative to the
+        checkpoint directory without the suffix (e.g. 'batch1/video5').
+        """
+        with os.scandir(directory or self.checkpoint_dir) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from self._scan_checkpoints(entry.path, prefix + entry.name + os.sep)
+                elif entry.name.endswith('.checkpoint'):
+                    yield prefix + entry.name[:-len('.checkpoint')], entry
+    
+    def _dir_signature(self, directory=None):
+        """
+        Return the mtime_ns of the checkpoint directory and every subfolder
+        
+        Adding or removing a nested checkpoint only touches its own folder's
+        mtime, so the whole tree is needed to tell whether a listing is stale.
+        """
+        directory = directory or self.checkpoint_dir
+        signature = [os.stat(directory).st_mtime_ns]
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    signature.append(entry.name)
+                    signature.extend(self._dir_signature(entry.path))
+        return tuple(signature)
+    
+    def save_checkpoint(self, operation_id, data, metadata=None, format=None):
         """
         Save a checkpoint for an operation
         
         Args:
-            operation_id: Unique identifier for the operation
+            operation_id: Unique identifier for the operation (may contain
+                subfolders, e.g. 'batch1/video5')
             data: Data to save (must be serializable)
             metadata: Optional metadata dictionary
+            format: 'msgpack' or 'json' (default: msgpack if installed, JSON
+                is human readable)
         
         Returns:
-            Path to checkpoint file
+            Path to checkpoint file (str)
+        
+        The data goes to '<id>.checkpoint' and everything else to a small
+        '<id>.meta.json' sidecar, so inspecting a checkpoint never has to
+        read the payload.
         """
         try:
-            checkpoint_file = self.checkpoint_dir / f"{operation_id}.checkpoint"
+            checkpoint_file = self._path(operation_id)
             
-            checkpoint = {
+            if format is None:
+                format = 'msgpack' if MSGPACK_AVAILABLE else 'json'
+            
+            meta = {
                 'operation_id': operation_id,
                 'timestamp': datetime.now().isoformat(),
-                'data': data,
-                'metadata': metadata or {}
+                'metadata': metadata or {},
+                'format': format
             }
             
-            with open(checkpoint_file, 'w', encoding='utf-8') as f:
-                json.dump(checkpoint, f, indent=2, default=str)
+            if format == 'msgpack':
+                payload = msgpack.packb(data, use_bin_type=True, default=_msgpack_default)
+            else:
+                payload = _json_dumps(data)
+            
+            if '/' in operation_id or os.sep in operation_id:
+                os.makedirs(os.path.dirname(checkpoint_file), exist_ok=True)
+            
+            with open(checkpoint_file, 'wb', buffering=CHECKPOINT_BUFFER_SIZE) as f:
+                f.write(payload)
+            with open(self._meta_path(operation_id), 'wb') as f:
+                f.write(_json_dumps(meta))
+            self._list_cache = None
             logger.info(f"Checkpoint saved: {checkpoint_file}")
             
             return checkpoint_file
@@ -60,14 +169,26 @@ class CheckpointManager:
             Checkpoint data or None if not found
         """
         try:
-            checkpoint_file = self.checkpoint_dir / f"{operation_id}.checkpoint"
+            checkpoint_file = self._path(operation_id)
             
-            if not checkpoint_file.exists():
+            try:
+                with open(checkpoint_file, 'rb', buffering=CHECKPOINT_BUFFER_SIZE) as f:
+                    payload = f.read()
+            except FileNotFoundError:
                 logger.debug(f"No checkpoint found for: {operation_id}")
                 return None
             
-            with open(checkpoint_file, 'r', encoding='utf-8') as f:
-                checkpoint = json.load(f)
+            meta = self.load_checkpoint_meta(operation_id)
+            if meta is None:
+                # Single-file checkpoint written before metadata was split out
+                checkpoint = self._decode(payload)
+            else:
+                checkpoint = {
+                    'operation_id': meta.get('operation_id', operation_id),
+                    'timestamp': meta.get('timestamp'),
+                    'data': self._decode(payload, meta.get('format')),
+                    'metadata': meta.get('metadata', {})
+                }
             logger.info(f"Checkpoint loaded: {checkpoint_file}")
             
             return checkpoint
@@ -76,6 +197,23 @@ class CheckpointManager:
             logger.error(f"Error loading checkpoint: {str(e)}")
             return None
     
+    def load_checkpoint_meta(self, operation_id):
+        """
+        Load only the metadata of a checkpoint (not its data)
+        
+        Args:
+            operation_id: Unique identifier for the operation
+        
+        Returns:
+            Dictionary with operation_id, timestamp, metadata and format,
+            or None if there is no metadata file
+        """
+        try:
+            with open(self._meta_path(operation_id), 'rb') as f:
+                return _json_loads(f.read())
+        except FileNotFoundError:
+            return None
+    
     def delete_checkpoint(self, operation_id):
         """
         Delete a checkpoint
@@ -87,10 +225,12 @@ class CheckpointManager:
             True if deleted, False otherwise
         """
         try:
-            checkpoint_file = self.checkpoint_dir / f"{operation_id}.checkpoint"
+            checkpoint_file = self._path(operation_id)
             
-            if checkpoint_file.exists():
-                checkpoint_file.unlink()
+            if os.path.exists(checkpoint_file):
+                os.unlink(checkpoint_file)
+                self._remove_meta(operation_id)
+                self._list_cache = None
                 logger.info(f"Checkpoint deleted: {checkpoint_file}")
                 return True
             else:
@@ -101,6 +241,13 @@ class CheckpointManager:
             logger.error(f"Error deleting checkpoint: {str(e)}")
             return False
     
+    def _remove_meta(self, operation_id):
+        """Remove the metadata sidecar of a checkpoint, if any"""
+        try:
+            os.unlink(self._meta_path(operation_id))
+        except FileNotFoundError:
+            pass
+    
     def list_checkpoints(self):
         """
         List all available checkpoints
@@ -109,26 +256,34 @@ class CheckpointManager:
             List of checkpoint information dictionaries
         """
         try:
+            # Reuse a recent scan if nothing was added or removed since
+            signature = self._dir_signature()
+            if self._list_cache is not None:
+                cached_signature, cached, cached_at = self._list_cache
+                if cached_signature == signature and time.monotonic() - cached_at < LIST_CACHE_TTL:
+                    return list(cached)
+            
             checkpoints = []
             
-            for checkpoint_file in self.checkpoint_dir.glob("*.checkpoint"):
+            # One scandir pass, one stat per entry
+            for operation_id, entry in self._scan_checkpoints():
                 try:
-                    # Try to load minimal info
-                    operation_id = checkpoint_file.stem
-                    
-                    # Get file modification time
-                    mtime = datetime.fromtimestamp(checkpoint_file.stat().st_mtime)
+                    st = entry.stat()
                     
                     checkpoints.append({
                         'operation_id': operation_id,
-                        'file': str(checkpoint_file),
-                        'modified': mtime.isoformat(),
-                        'size_bytes': checkpoint_file.stat().st_size
+                        'file': entry.path,
+                        'modified': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(st.st_mtime)),
+                        'modified_ts': st.st_mtime,
+                        'size_bytes': st.st_size
                     })
                 except Exception as e:
-                    logger.warning(f"Error reading checkpoint {checkpoint_file}: {str(e)}")
+                    logger.warning(f"Error reading checkpoint {entry.path}: {str(e)}")
+            
+            checkpoints.sort(key=lambda x: x['modified_ts'], reverse=True)
+            self._list_cache = (signature, checkpoints, time.monotonic())
             
-            return sorted(checkpoints, key=lambda x: x['modified'], reverse=True)
+            return list(checkpoints)
             
         except Exception as e:
             logger.error(f"Error listing checkpoints: {str(e)}")
@@ -146,22 +301,24 @@ class CheckpointManager:
         """
         try:
             deleted_count = 0
-            now = datetime.now()
+            now = time.time()
             
-            for checkpoint_file in self.checkpoint_dir.glob("*.checkpoint"):
+            for operation_id, entry in self._scan_checkpoints():
                 try:
-                    mtime = datetime.fromtimestamp(checkpoint_file.stat().st_mtime)
-                    age_days = (now - mtime).days
+                    # Whole days, compared as plain floats
+                    age_days = int((now - entry.stat().st_mtime) // 86400)
                     
                     if age_days > max_age_days:
-                        checkpoint_file.unlink()
+                        os.unlink(entry.path)
+                        self._remove_meta(operation_id)
                         deleted_count += 1
-                        logger.info(f"Deleted old checkpoint ({age_days} days): {checkpoint_file}")
+                        logger.info(f"Deleted old checkpoint ({age_days} days): {entry.path}")
                         
                 except Exception as e:
-                    logger.warning(f"Error deleting checkpoint {checkpoint_file}: {str(e)}")
+                    logger.warning(f"Error deleting checkpoint {entry.path}: {str(e)}")
             
             if deleted_count > 0:
+                self._list_cache = None
                 logger.info(f"Cleaned up {deleted_count} old checkpoints")
             
             return deleted_count
@@ -181,19 +338,24 @@ class CheckpointManager:
             Dictionary with checkpoint info or None
         """
         try:
-            checkpoint_file = self.checkpoint_dir / f"{operation_id}.checkpoint"
+            checkpoint_file = self._path(operation_id)
             
-            if not checkpoint_file.exists():
+            try:
+                stat = os.stat(checkpoint_file)
+            except FileNotFoundError:
                 return None
             
-            stat = checkpoint_file.stat()
+            # Only the small metadata sidecar is read, never the data
+            meta = self.load_checkpoint_meta(operation_id) or {}
             
             return {
                 'operation_id': operation_id,
-                'file': str(checkpoint_file),
+                'file': checkpoint_file,
                 'size_bytes': stat.st_size,
                 'size_mb': round(stat.st_size / (1024 * 1024), 2),
                 'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                'timestamp': meta.get('timestamp'),
+                'metadata': meta.get('metadata', {}),
                 'exists': True
             }
             
@@ -5,44 +5,44 @@ Custom exceptions for AutoSubtitle Studio
 
 class SubtitleGeneratorError(Exception):
     """Base exception for subtitle generator errors"""
-    pass
+    __slots__ = ()
 
 
 class AudioExtractionError(SubtitleGeneratorError):
     """Raised when audio extraction from video fails"""
-    pass
+    __slots__ = ()
 
 
 class TranscriptionError(SubtitleGeneratorError):
     """Raised when transcription/subtitle generation fails"""
-    pass
+    __slots__ = ()
 
 
 class SynchronizationError(SubtitleGeneratorError):
     """Raised when subtitle synchronization fails"""
-    pass
+    __slots__ = ()
 
 
 class VideoValidationError(SubtitleGeneratorError):
     """Raised when video file validation fails"""
-    pass
+    __slots__ = ()
 
 
 class InsufficientMemoryError(SubtitleGeneratorError):
     """Raised when insufficient memory for operation"""
-    pass
+    __slots__ = ()
 
 
 class ModelLoadError(SubtitleGeneratorError):
     """Raised when AI model loading fails"""
-    pass
+    __slots__ = ()
 
 
 class SubtitleFormatError(SubtitleGeneratorError):
     """Raised when subtitle format is invalid or unsupported"""
-    pass
+    __slots__ = ()
 
 
 class DownloadError(SubtitleGeneratorError):
     """Raised when subtitle download fails"""
-    pass
+    __slots__ = ()
@@ -1,16 +1,37 @@
 """
 Internationalization (i18n) support for AutoSubtitle Studio
 """
+import os
+import sys
 import logging
+from types import MappingProxyType
 from pathlib import Path
 import json
 
 logger = logging.getLogger(__name__)
 
+# Fast JSON for preferences, stdlib fallback (works on bytes)
+try:
+    import orjson
+    _json_loads = orjson.loads
+    
+    def _json_dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    _json_loads = json.loads
+    
+    def _json_dumps(obj):
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
+# Preferences file holding the UI language
+_PREF_FILE = Path.home() / '.autosubtitle_studio' / 'preferences.json'
+
 
 class I18n:
     """Internationalization manager"""
     
+    __slots__ = ('current_language', '_active', '_prefs')
+    
     # Translation dictionaries
     TRANSLATIONS = {
         'it': {
@@ -193,37 +214,39 @@ class I18n:
     
     def __init__(self):
         self.current_language = 'it'  # Default to Italian
+        self._prefs = {}  # Contents of the preferences file, kept for saving
         self.load_preferences()
+        # Translations of the current language, so lookups are a single dict get
+        self._active = self.TRANSLATIONS.get(self.current_language, {})
     
     def load_preferences(self):
         """Load language preference from file"""
         try:
-            pref_file = Path.home() / '.autosubtitle_studio' / 'preferences.json'
-            if pref_file.exists():
-                with open(pref_file, 'r', encoding='utf-8') as f:
-                    prefs = json.load(f)
-                    self.current_language = prefs.get('ui_language', 'it')
-                    logger.info(f"Loaded language preference: {self.current_language}")
+            with open(_PREF_FILE, 'rb') as f:
+                prefs = _json_loads(f.read())
+            self._prefs = prefs
+            self.current_language = prefs.get('ui_language', 'it')
+            logger.info(f"Loaded language preference: {self.current_language}")
+        except FileNotFoundError:
+            pass
         except Exception as e:
             logger.error(f"Error loading language preference: {str(e)}")
     
     def save_preferences(self):
         """Save language preference to file"""
         try:
-            pref_dir = Path.home() / '.autosubtitle_studio'
-            pref_dir.mkdir(exist_ok=True)
-            pref_file = pref_dir / 'preferences.json'
+            _PREF_FILE.parent.mkdir(exist_ok=True)
             
-            prefs = {}
-            if pref_file.exists():
-                with open(pref_file, 'r', encoding='utf-8') as f:
-                    prefs = json.load(f)
+            # Other keys were read at load time, no need to re-read the file
+            self._prefs['ui_language'] = self.current_language
             
-            prefs['ui_language'] = self.current_language
+            # Write to a temp file and swap it in, so a crash never leaves
+            # a truncated preferences file behind
+            tmp_file = _PREF_FILE.with_suffix('.json.tmp')
+            with open(tmp_file, 'wb') as f:
+                f.write(_json_dumps(self._prefs))
+            os.replace(tmp_file, _PREF_FILE)
             
-            with open(pref_file, 'w', encoding='utf-8') as f:
-                json.dump(prefs, f, indent=2, ensure_ascii=False)
-                
             logger.info(f"Saved language preference: {self.current_language}")
         except Exception as e:
             logger.error(f"Error saving language preference: {str(e)}")
@@ -237,7 +260,10 @@ class I18n:
         """
         if language_code in self.TRANSLATIONS:
             self.current_language = language_code
-            self.save_preferences()
+            self._active = self.TRANSLATIONS[language_code]
+            # Only touch the file when the stored preference actually changes
+            if self._prefs.get('ui_language') != language_code:
+                self.save_preferences()
             logger.info(f"Language set to: {language_code}")
         else:
             logger.warning(f"Language not supported: {language_code}")
@@ -253,8 +279,7 @@ class I18n:
         Returns:
             Translated string
         """
-        translations = self.TRANSLATIONS.get(self.current_language, {})
-        return translations.get(key, default or key)
+        return self._active.get(key, key if default is None else default)
     
     def get_available_languages(self):
         """
@@ -273,14 +298,16 @@ class I18n:
         return self.current_language
 
 
-# Global instance
-_i18n_instance = None
+# Intern keys and freeze the tables so shared translations can't be mutated
+for _lang, _table in I18n.TRANSLATIONS.items():
+    I18n.TRANSLATIONS[_lang] = MappingProxyType({sys.intern(k): v for k, v in _table.items()})
+del _lang, _table
+
+# Global instance, created at import so t() needs no initialization check
+_i18n_instance = I18n()
 
 def get_i18n():
     """Get global I18n instance"""
-    global _i18n_instance
-    if _i18n_instance is None:
-        _i18n_instance = I18n()
     return _i18n_instance
 
 def t(key, default=None):
@@ -294,4 +321,4 @@ def t(key, default=None):
     Returns:
         Translated string
     """
-    return get_i18n().get(key, default)
+    return _i18n_instance._active.get(key, key if default is None else default)
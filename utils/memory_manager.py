@@ -1,13 +1,26 @@
 """
 Memory management utilities to prevent out-of-memory errors
 """
+import time
+import bisect
 import logging
 from typing import Tuple, Dict
-import psutil
 import gc
 
 logger = logging.getLogger(__name__)
 
+# psutil is imported on first use so importing this module stays cheap
+psutil = None
+
+
+def _psutil():
+    """Return the psutil module, importing it on first use"""
+    global psutil
+    if psutil is None:
+        import psutil as psutil_module
+        psutil = psutil_module
+    return psutil
+
 
 class MemoryManager:
     """Manage memory resources and prevent OOM errors"""
@@ -21,11 +34,32 @@ class MemoryManager:
         'large': 10000,    # ~10GB
     }
     
+    # Models from smallest to largest memory requirement, for bisecting
+    _MODELS_ASC = sorted(WHISPER_MODEL_MEMORY.items(), key=lambda x: x[1])
+    _MODEL_NAMES_ASC = [name for name, _ in _MODELS_ASC]
+    _MODEL_MEMORY_ASC = [required for _, required in _MODELS_ASC]
+    
     # Safety margin (in MB) to leave for system
     SAFETY_MARGIN_MB = 512  # 512MB safety margin (ragionevole per la maggior parte dei sistemi)
     
+    # Seconds a virtual_memory() snapshot is reused (UI polling reads it often)
+    MEMORY_CACHE_TTL = 0.1
+    
     def __init__(self):
-        pass
+        # (monotonic time, psutil.virtual_memory() result)
+        self._mem_cache = (0.0, None)
+        # This process, for RSS measurements unaffected by other processes
+        # (created on first use)
+        self._proc = None
+    
+    def _vm(self):
+        """Return psutil.virtual_memory(), cached for MEMORY_CACHE_TTL seconds"""
+        now = time.monotonic()
+        ts, mem = self._mem_cache
+        if mem is None or now - ts > self.MEMORY_CACHE_TTL:
+            mem = _psutil().virtual_memory()
+            self._mem_cache = (now, mem)
+        return mem
     
     def get_available_memory(self) -> float:
         """
@@ -35,7 +69,7 @@ class MemoryManager:
             Available memory in MB
         """
         try:
-            mem = psutil.virtual_memory()
+            mem = self._vm()
             available_mb = mem.available / (1024 * 1024)
             return available_mb
         except Exception as e:
@@ -50,7 +84,7 @@ class MemoryManager:
             Total memory in MB
         """
         try:
-            mem = psutil.virtual_memory()
+            mem = self._vm()
             total_mb = mem.total / (1024 * 1024)
             return total_mb
         except Exception as e:
@@ -65,7 +99,7 @@ class MemoryManager:
             Memory usage percentage (0-100)
         """
         try:
-            mem = psutil.virtual_memory()
+            mem = self._vm()
             return mem.percent
         except Exception as e:
             logger.error(f"Error getting memory usage: {str(e)}")
@@ -126,18 +160,16 @@ class MemoryManager:
         available_mb = self.get_available_memory()
         
         # Find the largest model that fits in available memory
-        models_sorted = sorted(self.WHISPER_MODEL_MEMORY.items(), 
-                              key=lambda x: x[1], 
-                              reverse=True)
-        
-        for model_name, required_mb in models_sorted:
-            if available_mb >= (required_mb + self.SAFETY_MARGIN_MB):
-                message = (
-                    f"💡 Modello consigliato: '{model_name}'\n"
-                    f"  Basato su memoria disponibile: {available_mb:.0f} MB\n"
-                    f"  Requisiti modello: ~{required_mb} MB"
-                )
-                return model_name, message
+        idx = bisect.bisect_right(self._MODEL_MEMORY_ASC, available_mb - self.SAFETY_MARGIN_MB) - 1
+        if idx >= 0:
+            model_name = self._MODEL_NAMES_ASC[idx]
+            required_mb = self._MODEL_MEMORY_ASC[idx]
+            message = (
+                f"💡 Modello consigliato: '{model_name}'\n"
+                f"  Basato su memoria disponibile: {available_mb:.0f} MB\n"
+                f"  Requisiti modello: ~{required_mb} MB"
+            )
+            return model_name, message
         
         # If even tiny doesn't fit, still suggest it with warning
         message = (
@@ -155,12 +187,15 @@ class MemoryManager:
             Number of objects collected
         """
         logger.info("Forcing garbage collection...")
-        before_mb = self.get_available_memory()
+        # Measure this process' RSS: system-wide available memory also moves
+        # with other processes and made the freed amount unreliable
+        if self._proc is None:
+            self._proc = _psutil().Process()
+        before_rss = self._proc.memory_info().rss
         
         collected = gc.collect()
         
-        after_mb = self.get_available_memory()
-        freed_mb = after_mb - before_mb
+        freed_mb = (before_rss - self._proc.memory_info().rss) / (1024 * 1024)
         
         if freed_mb > 0:
             logger.info(f"Garbage collection freed ~{freed_mb:.0f} MB ({collected} objects)")
@@ -172,7 +207,7 @@ class MemoryManager:
     def log_memory_status(self):
         """Log current memory status"""
         try:
-            mem = psutil.virtual_memory()
+            mem = self._vm()
             total_gb = mem.total / (1024 ** 3)
             available_gb = mem.available / (1024 ** 3)
             used_gb = mem.used / (1024 ** 3)
@@ -196,7 +231,7 @@ class MemoryManager:
             Dictionary with memory information
         """
         try:
-            mem = psutil.virtual_memory()
+            mem = self._vm()
             
             return {
                 'total_mb': mem.total / (1024 * 1024),
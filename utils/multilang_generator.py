@@ -1,13 +1,150 @@
 """
 Multi-language subtitle generator
 """
+import os
+import time
+import shutil
+import asyncio
 import logging
-from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
+import multiprocessing
+from pathlib import Path
+from types import MappingProxyType
+from concurrent.futures import ProcessPoolExecutor
 
 logger = logging.getLogger(__name__)
 
+# Whisper processing speed (seconds of video per second of processing)
+_WHISPER_SPEEDS = {
+    'tiny': 20,
+    'tiny.en': 20,
+    'base': 15,
+    'base.en': 15,
+    'small': 10,
+    'small.en': 10,
+    'medium': 5,
+    'medium.en': 5,
+    'large': 3,
+    'large-v1': 3,
+    'large-v2': 3,
+    'large-v3': 3,
+    'large-v3-turbo': 8,
+    'turbo': 8,
+}
+
+# Languages offered for multi-language generation (read-only, shared by all callers)
+_SUPPORTED_LANGUAGES = MappingProxyType({
+    'it': 'Italiano',
+    'en': 'English',
+    'es': 'Español',
+    'fr': 'Français',
+    'de': 'Deutsch',
+    'pt': 'Português',
+    'ru': 'Русский',
+    'zh': '中文',
+    'ja': '日本語',
+    'ko': '한국어',
+    'ar': 'العربية',
+    'hi': 'हिन्दी',
+    'nl': 'Nederlands',
+    'pl': 'Polski',
+    'tr': 'Türkçe',
+    'sv': 'Svenska',
+    'no': 'Norsk',
+    'da': 'Dansk',
+    'fi': 'Suomi',
+    'cs': 'Čeština',
+    'uk': 'Українська',
+    'ro': 'Română',
+    'el': 'Ελληνικά',
+    'hu': 'Magyar',
+    'th': 'ไทย',
+    'id': 'Bahasa Indonesia',
+    'vi': 'Tiếng Việt',
+    'he': 'עברית',
+    'fa': 'فارسی',
+})
+
+# Progress messages always forwarded (completion, failure, warning,
+# cancellation, summary)
+_PROGRESS_KEY_MARKERS = ('✅', '❌', '✓', '✗', '📊', '⚠️', 'ERRORE')
+
+
+class _ThrottledCallback:
+    """
+    Progress callback wrapper that runs at most once every min_interval seconds
+    
+    Whisper reports every segment of every language; messages arriving
+    faster than the UI can show them are held back, except those carrying
+    one of _PROGRESS_KEY_MARKERS. The latest held-back message is emitted
+    by a trailing timer (or flush()), so the UI never stays on a stale one.
+    """
+    
+    def __init__(self, callback, min_interval=0.05):
+        self.callback = callback
+        self.min_interval = min_interval
+        self._last_emit = float('-inf')
+        self._pending = None
+        self._timer = None
+        self._lock = threading.Lock()
+    
+    def __call__(self, message):
+        with self._lock:
+            now = time.monotonic()
+            if (now - self._last_emit < self.min_interval
+                    and not any(m in message for m in _PROGRESS_KEY_MARKERS)):
+                self._pending = message
+                if self._timer is None:
+                    self._timer = threading.Timer(
+                        self.min_interval - (now - self._last_emit), self.flush
+                    )
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+            # Anything held back is superseded by this message
+            self._pending = None
+            self._last_emit = now
+        self.callback(message)
+    
+    def flush(self):
+        """Emit the last held-back message, if any"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            message, self._pending = self._pending, None
+            if message is None:
+                return
+            self._last_emit = time.monotonic()
+        self.callback(message)
+
+
+def _throttled(callback, min_interval=0.05):
+    """Wrap a progress callback in a _ThrottledCallback (None stays None)"""
+    if callback is None:
+        return None
+    return _ThrottledCallback(callback, min_interval)
+
+
+def _generate_language_in_process(video_path, language, model_name, output_format):
+    """
+    Generate subtitles for one language in a worker process
+    
+    The application controller can't be pickled, so each worker builds its
+    own and loads its own Whisper model; only the resulting path is sent
+    back to the parent.
+    
+    Returns:
+        Path to generated subtitle file (str), or None
+    """
+    from app_controller import AppController
+    
+    generator = MultiLanguageGenerator(AppController())
+    result = generator._generate_single_language(
+        video_path, language, model_name, output_format, None, None
+    )
+    return str(result) if result else None
+
 
 class MultiLanguageGenerator:
     """Generate subtitles in multiple languages simultaneously"""
@@ -22,11 +159,11 @@ class MultiLanguageGenerator:
         self.controller = controller
         self.results = {}
         self.errors = {}
-        self.lock = threading.Lock()
     
     def generate_multiple_languages(self, video_path, languages, model_name="base", 
                                     output_format="srt", progress_callback=None,
-                                    cancellation_token=None, parallel=True):
+                                    cancellation_token=None, parallel=True,
+                                    use_processes=False, source_language=None):
         """
         Generate subtitles in multiple languages
         
@@ -38,10 +175,50 @@ class MultiLanguageGenerator:
             progress_callback: Progress callback function
             cancellation_token: Cancellation token
             parallel: Generate in parallel (faster) or sequential (less memory)
+            use_processes: In parallel mode, run each language in its own
+                process instead of a thread (no per-language progress or
+                cancellation, each process loads its own model)
+            source_language: Spoken language of the video (optional). When
+                given, Whisper transcribes only once in this language and the
+                other languages are translated from that transcript
         
         Returns:
             Dictionary with language: subtitle_path pairs
+        
+        Must not be called from a thread that is already running an event
+        loop; use generate_multiple_languages_async there instead.
         """
+        return asyncio.run(self.generate_multiple_languages_async(
+            video_path, languages, model_name, output_format,
+            progress_callback, cancellation_token, parallel, use_processes,
+            source_language
+        ))
+    
+    async def generate_multiple_languages_async(self, video_path, languages, model_name="base",
+                                                output_format="srt", progress_callback=None,
+                                                cancellation_token=None, parallel=True,
+                                                use_processes=False, source_language=None):
+        """
+        Generate subtitles in multiple languages (coroutine version)
+        
+        Args:
+            video_path: Path to video file
+            languages: List of language codes (e.g., ['it', 'en'])
+            model_name: Whisper model to use
+            output_format: Subtitle format
+            progress_callback: Progress callback function
+            cancellation_token: Cancellation token
+            parallel: Generate in parallel (faster) or sequential (less memory)
+            use_processes: In parallel mode, run each language in its own process
+            source_language: Transcribe once in this language and translate
+                the others (optional)
+        
+        Returns:
+            Dictionary with language: subtitle_path pairs
+        """
+        # Limit UI updates from all languages together (~20 per second)
+        progress_callback = _throttled(progress_callback)
+        
         try:
             video_path = Path(video_path)
             
@@ -59,82 +236,275 @@ class MultiLanguageGenerator:
             self.results = {}
             self.errors = {}
             
-            if parallel:
+            # Decode the soundtrack once and reuse it for every language
+            # (process workers can't share it and extract their own; a single
+            # transcription doesn't need it)
+            audio = None
+            if not source_language and not (parallel and use_processes):
+                log("🎵 Estrazione audio (una sola volta per tutte le lingue)...")
+                audio = await asyncio.to_thread(self._extract_audio, video_path)
+            
+            if source_language:
+                # A single Whisper pass; the other languages are text-only translations
+                log(f"🔤 Trascrizione unica in {source_language.upper()}, traduzione per le altre lingue...")
+                languages = list(dict.fromkeys([source_language, *languages]))
+                await self._generate_translated(
+                    video_path, languages, source_language, model_name,
+                    output_format, progress_callback, cancellation_token, parallel
+                )
+            elif parallel:
                 # Generate in parallel (faster but uses more memory)
                 log("⚡ Avvio generazione parallela...")
-                self._generate_parallel(
+                await self._generate_parallel(
                     video_path, languages, model_name, 
-                    output_format, progress_callback, cancellation_token
+                    output_format, progress_callback, cancellation_token,
+                    use_processes, audio
                 )
             else:
                 # Generate sequentially (slower but uses less memory)
                 log("🔄 Avvio generazione sequenziale...")
-                self._generate_sequential(
+                await asyncio.to_thread(
+                    self._generate_sequential,
                     video_path, languages, model_name,
-                    output_format, progress_callback, cancellation_token
+                    output_format, progress_callback, cancellation_token, audio
                 )
             
-            # Summary
-            log("")
-            log("=" * 60)
-            log("📊 RIEPILOGO GENERAZIONE MULTI-LINGUA")
-            log("=" * 60)
+            # Summary (built first, then emitted with a single log call)
+            lines = [
+                "",
+                "=" * 60,
+                "📊 RIEPILOGO GENERAZIONE MULTI-LINGUA",
+                "=" * 60,
+            ]
             
             if self.results:
-                log(f"✅ Sottotitoli generati con successo: {len(self.results)}/{len(languages)}")
-                for lang, path in self.results.items():
-                    log(f"   • {lang.upper()}: {Path(path).name}")
+                lines.append(f"✅ Sottotitoli generati con successo: {len(self.results)}/{len(languages)}")
+                lines.extend(f"   • {lang.upper()}: {Path(path).name}"
+                             for lang, path in self.results.items())
             
             if self.errors:
-                log(f"❌ Errori: {len(self.errors)}/{len(languages)}")
-                for lang, error in self.errors.items():
-                    log(f"   • {lang.upper()}: {str(error)[:50]}")
+                lines.append(f"❌ Errori: {len(self.errors)}/{len(languages)}")
+                lines.extend(f"   • {lang.upper()}: {str(error)[:50]}"
+                             for lang, error in self.errors.items())
             
-            log("=" * 60)
+            lines.append("=" * 60)
+            log("\n".join(lines))
             
             return self.results
             
         except Exception as e:
             logger.error(f"Error in multi-language generation: {str(e)}")
             raise
+        finally:
+            if progress_callback:
+                progress_callback.flush()
     
-    def _generate_parallel(self, video_path, languages, model_name, 
-                          output_format, progress_callback, cancellation_token):
-        """Generate subtitles in parallel using ThreadPoolExecutor"""
+    async def _generate_parallel(self, video_path, languages, model_name,
+                                 output_format, progress_callback, cancellation_token,
+                                 use_processes=False, audio=None):
+        """Generate subtitles in parallel, each language in a worker thread or process"""
+        executor = None
         try:
-            # Use ThreadPoolExecutor for parallel execution
-            max_workers = min(len(languages), 3)  # Max 3 parallel to avoid memory issues
+            max_workers = self._compute_max_workers(model_name, len(languages), use_processes)
             
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # Submit all tasks
-                future_to_lang = {}
-                for lang in languages:
-                    future = executor.submit(
-                        self._generate_single_language,
-                        video_path, lang, model_name, output_format,
-                        progress_callback, cancellation_token
+            if use_processes:
+                try:
+                    # spawn: workers must not inherit loaded models or GUI state
+                    executor = ProcessPoolExecutor(
+                        max_workers=max_workers,
+                        mp_context=multiprocessing.get_context("spawn")
                     )
-                    future_to_lang[future] = lang
-                
-                # Wait for completion
-                for future in as_completed(future_to_lang):
-                    lang = future_to_lang[future]
-                    try:
-                        result = future.result()
-                        with self.lock:
-                            self.results[lang] = result
-                        logger.info(f"✓ Completed: {lang}")
-                    except Exception as e:
-                        with self.lock:
-                            self.errors[lang] = str(e)
-                        logger.error(f"✗ Failed: {lang} - {str(e)}")
+                except (OSError, NotImplementedError, ValueError) as e:
+                    logger.warning(f"Process pool unavailable, using threads: {str(e)}")
+            
+            if executor is None:
+                # Threads share the controller's model: load it once up front
+                await asyncio.to_thread(self._preload_model, model_name)
+            
+            loop = asyncio.get_running_loop()
+            
+            # Each process holds its own model, so a new one only starts while
+            # memory allows it (or when nothing else is running)
+            worker_cost_mb = self._worker_memory_mb(model_name) if executor is not None else 0
+            slots = asyncio.Condition()
+            running = 0
+            
+            def can_start():
+                if running >= max_workers:
+                    return False
+                return running == 0 or self._memory_allows(worker_cost_mb)
+            
+            async def generate(lang):
+                nonlocal running
+                async with slots:
+                    await slots.wait_for(can_start)
+                    running += 1
+                try:
+                    # The controller call blocks, so it runs off the event loop
+                    if executor is not None:
+                        if progress_callback:
+                            progress_callback(f"[{lang.upper()}] Avviato in un processo separato...")
+                        result = await loop.run_in_executor(
+                            executor, _generate_language_in_process,
+                            str(video_path), lang, model_name, output_format
+                        )
+                    else:
+                        result = await asyncio.to_thread(
+                            self._generate_single_language,
+                            video_path, lang, model_name, output_format,
+                            progress_callback, cancellation_token, audio
+                        )
+                    # Results are only written from the event loop thread
+                    self.results[lang] = result
+                    logger.info(f"✓ Completed: {lang}")
+                except Exception as e:
+                    self.errors[lang] = str(e)
+                    logger.error(f"✗ Failed: {lang} - {str(e)}")
+                finally:
+                    # Re-evaluate memory for waiting languages
+                    async with slots:
+                        running -= 1
+                        slots.notify_all()
+            
+            await asyncio.gather(*(generate(lang) for lang in languages))
                         
         except Exception as e:
             logger.error(f"Error in parallel generation: {str(e)}")
             raise
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+    
+    async def _generate_translated(self, video_path, languages, source_language, model_name,
+                                   output_format, progress_callback, cancellation_token,
+                                   parallel=True):
+        """
+        Transcribe once in source_language, then translate the subtitles
+        into every other language
+        
+        Translation only touches the text, so the target languages can run
+        concurrently without competing for the Whisper model.
+        """
+        from services.translation_service import TranslationService
+        
+        try:
+            source_path = await asyncio.to_thread(
+                self._generate_single_language,
+                video_path, source_language, model_name, output_format,
+                progress_callback, cancellation_token
+            )
+            if not source_path:
+                raise RuntimeError("Trascrizione non riuscita")
+        except Exception as e:
+            # Nothing to translate from: every language fails
+            for lang in languages:
+                self.errors[lang] = str(e)
+            logger.error(f"✗ Failed: {source_language} - {str(e)}")
+            return
+        
+        source_path = Path(source_path)
+        self.results[source_language] = source_path
+        logger.info(f"✓ Completed: {source_language}")
+        
+        translator = TranslationService(service='google')
+        
+        async def translate(lang):
+            def lang_callback(message):
+                if progress_callback:
+                    progress_callback(f"[{lang.upper()}] {message}")
+            
+            try:
+                if cancellation_token:
+                    cancellation_token.check_cancelled()
+                target_path = source_path.parent / f"{video_path.stem}_{lang}{source_path.suffix}"
+                self.results[lang] = await asyncio.to_thread(
+                    translator.translate_subtitle_file,
+                    source_path, target_path, source_language, lang, lang_callback
+                )
+                logger.info(f"✓ Completed: {lang}")
+            except Exception as e:
+                self.errors[lang] = str(e)
+                logger.error(f"✗ Failed: {lang} - {str(e)}")
+        
+        targets = [lang for lang in languages if lang != source_language]
+        if parallel:
+            await asyncio.gather(*(translate(lang) for lang in targets))
+        else:
+            for lang in targets:
+                await translate(lang)
+    
+    def _worker_memory_mb(self, model_name):
+        """Memory (MB) one process worker needs for its own copy of the model"""
+        memory_manager = self.controller.memory_manager
+        return memory_manager.WHISPER_MODEL_MEMORY.get(model_name, 1500)
+    
+    def _memory_allows(self, required_mb):
+        """Check whether another worker needing required_mb fits in free RAM"""
+        memory_manager = self.controller.memory_manager
+        available_mb = memory_manager.get_available_memory()
+        return available_mb >= required_mb + memory_manager.SAFETY_MARGIN_MB
+    
+    def _compute_max_workers(self, model_name, num_languages, use_processes):
+        """
+        Choose how many languages run at once
+        
+        Threads share one model and transcribe one at a time, so only a few
+        are useful. Processes each load a model, so their count follows the
+        free memory: many for 'tiny', a single one for 'large' on most
+        machines.
+        
+        Args:
+            model_name: Whisper model name
+            num_languages: Number of languages to generate
+            use_processes: Whether workers are processes
+        
+        Returns:
+            Number of concurrent workers (at least 1)
+        """
+        if not use_processes:
+            return max(1, min(num_languages, 3))
+        
+        memory_manager = self.controller.memory_manager
+        available_mb = memory_manager.get_available_memory() - memory_manager.SAFETY_MARGIN_MB
+        by_memory = int(available_mb // self._worker_memory_mb(model_name))
+        
+        max_workers = max(1, min(num_languages, by_memory, os.cpu_count() or 1))
+        logger.info(f"Parallel workers for '{model_name}': {max_workers} "
+                    f"({available_mb:.0f} MB available)")
+        return max_workers
+    
+    def _extract_audio(self, video_path):
+        """
+        Decode the video's soundtrack once for all languages
+        
+        Args:
+            video_path: Path to video file
+        
+        Returns:
+            16 kHz mono float32 samples, or None if decoding failed (each
+            language then extracts the audio itself)
+        """
+        from utils.audio_preprocessor import AudioPreprocessor
+        
+        try:
+            return AudioPreprocessor().filter_to_array(video_path, [])
+        except Exception as e:
+            logger.warning(f"Shared audio extraction failed: {str(e)}")
+            return None
+    
+    def _preload_model(self, model_name):
+        """
+        Load the Whisper model once before parallel generation
+        
+        All languages then reuse the controller's loaded model instead of
+        racing to load it; their transcriptions are serialized on it while
+        validation, extraction and export still overlap.
+        """
+        with self.controller.whisper_lock:
+            self.controller._get_whisper_engine(model_name)
     
     def _generate_sequential(self, video_path, languages, model_name,
-                            output_format, progress_callback, cancellation_token):
+                            output_format, progress_callback, cancellation_token, audio=None):
         """Generate subtitles sequentially (one at a time)"""
         try:
             for idx, lang in enumerate(languages, 1):
@@ -144,7 +514,7 @@ class MultiLanguageGenerator:
                     
                     result = self._generate_single_language(
                         video_path, lang, model_name, output_format,
-                        progress_callback, cancellation_token
+                        progress_callback, cancellation_token, audio
                     )
                     
                     self.results[lang] = result
@@ -160,7 +530,8 @@ class MultiLanguageGenerator:
             raise
     
     def _generate_single_language(self, video_path, language, model_name,
-                                  output_format, progress_callback, cancellation_token):
+                                  output_format, progress_callback, cancellation_token,
+                                  audio=None):
         """
         Generate subtitles for a single language
         
@@ -171,16 +542,27 @@ class MultiLanguageGenerator:
             output_format: Subtitle format
             progress_callback: Progress callback
             cancellation_token: Cancellation token
+            audio: Pre-decoded audio shared between languages (optional)
         
         Returns:
             Path to generated subtitle file
+        
+        Each language exports into its own temporary directory, so languages
+        running at the same time never write the same file; the result is
+        moved next to the others once it is complete.
         """
+        temp_dir = None
         try:
             # Create language-specific callback
             def lang_callback(message):
                 if progress_callback:
                     progress_callback(f"[{language.upper()}] {message}")
             
+            # Private directory on the same filesystem as the final output
+            output_dir = self.controller.get_output_directory()
+            temp_dir = Path(output_dir) / f".tmp_{language}_{os.getpid()}"
+            temp_dir.mkdir(parents=True, exist_ok=True)
+            
             # Generate subtitles using controller
             result = self.controller.generate_subtitles(
                 video_path=video_path,
@@ -188,28 +570,31 @@ class MultiLanguageGenerator:
                 output_format=output_format,
                 model_name=model_name,
                 progress_callback=lang_callback,
-                cancellation_token=cancellation_token
+                cancellation_token=cancellation_token,
+                audio=audio,
+                output_dir=temp_dir
             )
             
-            # Rename file to include language code
+            # Move to the output directory with the language code in the name
             if result:
                 result_path = Path(result)
                 new_name = f"{result_path.stem}_{language}{result_path.suffix}"
-                new_path = result_path.parent / new_name
-                
-                # Rename if needed
-                if result_path != new_path:
-                    result_path.rename(new_path)
-                    logger.info(f"Renamed to: {new_path.name}")
-                    return new_path
+                new_path = Path(output_dir) / new_name
                 
-                return result
+                # Replaces a previous run's file on every platform
+                os.replace(result_path, new_path)
+                logger.info(f"Renamed to: {new_path.name}")
+                return new_path
             
             return None
             
         except Exception as e:
             logger.error(f"Error generating {language} subtitles: {str(e)}")
             raise
+        finally:
+            # Also discards partial output after errors or cancellation
+            if temp_dir is not None:
+                shutil.rmtree(temp_dir, ignore_errors=True)
     
     def estimate_time(self, video_duration, num_languages, model_name="base", parallel=True):
         """
@@ -224,16 +609,7 @@ class MultiLanguageGenerator:
         Returns:
             Estimated time in seconds
         """
-        # Base processing speed (seconds of video per second of processing)
-        speeds = {
-            'tiny': 20,
-            'base': 15,
-            'small': 10,
-            'medium': 5,
-            'large': 3
-        }
-        
-        speed = speeds.get(model_name, 10)
+        speed = _WHISPER_SPEEDS.get(model_name, 10)
         single_lang_time = video_duration / speed
         
         if parallel:
@@ -252,36 +628,7 @@ class MultiLanguageGenerator:
         Get list of supported languages
         
         Returns:
-            Dictionary of language_code: language_name
+            Read-only mapping of language_code: language_name
+            (copy it with dict() before modifying)
         """
-        return {
-            'it': 'Italiano',
-            'en': 'English',
-            'es': 'Español',
-            'fr': 'Français',
-            'de': 'Deutsch',
-            'pt': 'Português',
-            'ru': 'Русский',
-            'zh': '中文',
-            'ja': '日本語',
-            'ko': '한국어',
-            'ar': 'العربية',
-            'hi': 'हिन्दी',
-            'nl': 'Nederlands',
-            'pl': 'Polski',
-            'tr': 'Türkçe',
-            'sv': 'Svenska',
-            'no': 'Norsk',
-            'da': 'Dansk',
-            'fi': 'Suomi',
-            'cs': 'Čeština',
-            'uk': 'Українська',
-            'ro': 'Română',
-            'el': 'Ελληνικά',
-            'hu': 'Magyar',
-            'th': 'ไทย',
-            'id': 'Bahasa Indonesia',
-            'vi': 'Tiếng Việt',
-            'he': 'עברית',
-            'fa': 'فارسی',
-        }
+        return _SUPPORTED_LANGUAGES
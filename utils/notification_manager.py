@@ -1,12 +1,50 @@
 """
 Desktop notification manager for user alerts
 """
+import queue
 import logging
 import platform
+import threading
+import functools
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Pending notifications kept while the delivery thread is busy (oldest dropped first)
+NOTIFICATION_QUEUE_SIZE = 32
+
+
+@functools.lru_cache(maxsize=None)
+def _probe_backend(system):
+    """
+    Import the notification backends available on this platform (once per process)
+    
+    Args:
+        system: platform.system() value
+    
+    Returns:
+        Tuple of (win10toast ToastNotifier class or None, plyer notification or None)
+    """
+    toast_notifier = None
+    notification = None
+    
+    if system == "Windows":
+        # Try to import win10toast for Windows notifications
+        try:
+            from win10toast import ToastNotifier
+            toast_notifier = ToastNotifier
+        except ImportError:
+            pass
+    
+    if system in ["Windows", "Linux", "Darwin"]:  # Darwin = macOS
+        # plyer: cross-platform, and fallback for win10toast
+        try:
+            from plyer import notification
+        except ImportError:
+            pass
+    
+    return toast_notifier, notification
+
 
 class NotificationManager:
     """Manage desktop notifications across different platforms"""
@@ -14,38 +52,46 @@ class NotificationManager:
     def __init__(self, app_name="Subtitle Generator"):
         self.app_name = app_name
         self.system = platform.system()
-        self._check_notification_support()
+        # Backends are imported on first use, keeping construction import-free
+        self._supported = None
+        # Delivery runs on a single daemon thread, started on first notification
+        self._queue = queue.Queue(maxsize=NOTIFICATION_QUEUE_SIZE)
+        self._worker = None
+        self._worker_lock = threading.Lock()
+    
+    @property
+    def supported(self):
+        """Whether desktop notifications are available (probed on first access)"""
+        if self._supported is None:
+            self._check_notification_support()
+        return self._supported
     
     def _check_notification_support(self):
         """Check if notifications are supported on this platform"""
-        self.supported = False
+        self._supported = False
         
         try:
+            toast_notifier, notification = _probe_backend(self.system)
+            
             if self.system == "Windows":
-                # Try to import win10toast for Windows notifications
-                try:
-                    from win10toast import ToastNotifier
-                    self.notifier = ToastNotifier()
-                    self.supported = True
+                if toast_notifier is not None:
+                    self.notifier = toast_notifier()
+                    self._supported = True
                     logger.info("Windows notifications supported (win10toast)")
-                except ImportError:
+                elif notification is not None:
                     # Fallback to plyer
-                    try:
-                        from plyer import notification
-                        self.notification = notification
-                        self.supported = True
-                        logger.info("Windows notifications supported (plyer)")
-                    except ImportError:
-                        logger.warning("Desktop notifications not available. Install 'win10toast' or 'plyer' for notification support.")
+                    self.notification = notification
+                    self._supported = True
+                    logger.info("Windows notifications supported (plyer)")
+                else:
+                    logger.warning("Desktop notifications not available. Install 'win10toast' or 'plyer' for notification support.")
                         
             elif self.system in ["Linux", "Darwin"]:  # Darwin = macOS
-                # Try to use plyer for cross-platform notifications
-                try:
-                    from plyer import notification
+                if notification is not None:
                     self.notification = notification
-                    self.supported = True
+                    self._supported = True
                     logger.info(f"{self.system} notifications supported (plyer)")
-                except ImportError:
+                else:
                     logger.warning("Desktop notifications not available. Install 'plyer' for notification support.")
             else:
                 logger.warning(f"Desktop notifications not supported on {self.system}")
@@ -64,12 +110,51 @@ class NotificationManager:
             icon_path: Optional path to icon file
         
         Returns:
-            True if notification was shown, False otherwise
+            True if notification was queued, False otherwise
         """
         if not self.supported:
             logger.debug("Notifications not supported, skipping")
             return False
         
+        self._ensure_worker()
+        job = (title, message, duration, icon_path)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            # Delivery is stalled: drop the oldest pending notification
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                logger.debug(f"Notification queue full, dropping: {title}")
+                return False
+        return True
+    
+    def _ensure_worker(self):
+        """Start the delivery thread if it is not running yet"""
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._deliver_loop,
+                                                name="NotificationWorker",
+                                                daemon=True)
+                self._worker.start()
+    
+    def _deliver_loop(self):
+        """Deliver queued notifications one at a time"""
+        while True:
+            title, message, duration, icon_path = self._queue.get()
+            self._deliver(title, message, duration, icon_path)
+    
+    def _deliver(self, title, message, duration, icon_path):
+        """
+        Show a notification through the available backend (blocking)
+        
+        Returns:
+            True if notification was shown, False otherwise
+        """
         try:
             if self.system == "Windows":
                 # Try win10toast first
@@ -126,7 +211,7 @@ class NotificationManager:
             title: Optional custom title (default: "Operazione Completata")
         
         Returns:
-            True if notification was shown
+            True if notification was queued
         """
         title = title or "✅ Operazione Completata"
         return self.show_notification(title, message, duration=10)
@@ -140,7 +225,7 @@ class NotificationManager:
             title: Optional custom title (default: "Errore")
         
         Returns:
-            True if notification was shown
+            True if notification was queued
         """
         title = title or "❌ Errore"
         return self.show_notification(title, message, duration=15)
@@ -154,7 +239,7 @@ class NotificationManager:
             title: Optional custom title (default: "Attenzione")
         
         Returns:
-            True if notification was shown
+            True if notification was queued
         """
         title = title or "⚠️ Attenzione"
         return self.show_notification(title, message, duration=12)
@@ -168,7 +253,7 @@ class NotificationManager:
             title: Optional custom title (default: "Informazione")
         
         Returns:
-            True if notification was shown
+            True if notification was queued
         """
         title = title or "ℹ️ Informazione"
         return self.show_notification(title, message, duration=8)
@@ -1,19 +1,48 @@
 """
 User preferences management
 """
+import os
 import json
+import atexit
 import logging
+import threading
 from pathlib import Path
+from collections import OrderedDict
 
 logger = logging.getLogger(__name__)
 
+# Fast JSON for preferences, stdlib fallback (both produce bytes)
+try:
+    import orjson
+    
+    def _json_dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    def _json_dumps(obj):
+        return json.dumps(obj, indent=4, ensure_ascii=False).encode('utf-8')
+
 
 class PreferencesManager:
     """Manage user preferences"""
     
+    # Auto-saves are written once changes have been quiet for this long (seconds)
+    SAVE_DEBOUNCE_SECONDS = 0.5
+    
     def __init__(self, prefs_file="user_preferences.json"):
         self.prefs_file = Path(prefs_file)
         self.preferences = self._load_preferences()
+        self._load_recent()
+        
+        # Pending auto-save state
+        self._dirty = False
+        self._changes = 0  # Bumped on every change, so a save knows what it covered
+        self._last_saved = None  # Bytes last written, to skip unchanged saves
+        self._save_timer = None
+        # Guards preferences while they are changed or serialized (reentrant:
+        # flush() saves while holding it)
+        self._save_lock = threading.RLock()
+        # Don't lose a pending auto-save on exit
+        atexit.register(self.flush)
         
     def _load_preferences(self):
         """Load preferences from file"""
@@ -44,48 +73,96 @@ class PreferencesManager:
             'translation_service': 'google'
         }
     
+    def _load_recent(self):
+        """Build the recent videos MRU from the stored list"""
+        # Oldest first, so the most recent entry is at the end (O(1) updates)
+        self._recent = OrderedDict.fromkeys(reversed(self.preferences.get('last_videos', [])))
+    
     def save_preferences(self):
         """Save preferences to file"""
         try:
-            with open(self.prefs_file, 'w', encoding='utf-8') as f:
-                json.dump(self.preferences, f, indent=4, ensure_ascii=False)
-            logger.info("Preferences saved successfully")
+            # Snapshot under the lock, so a concurrent set() can't change
+            # the preferences mid-serialization
+            with self._save_lock:
+                self.preferences['last_videos'] = self.get_last_videos()
+                payload = _json_dumps(self.preferences)
+                changes = self._changes
+            
+            if payload != self._last_saved:
+                # Write a temp file and swap it in, so the file is never half-written
+                tmp_file = self.prefs_file.with_name(self.prefs_file.name + '.tmp')
+                with open(tmp_file, 'wb') as f:
+                    f.write(payload)
+                os.replace(tmp_file, self.prefs_file)
+                self._last_saved = payload
+                logger.info("Preferences saved successfully")
+            else:
+                logger.debug("Preferences unchanged, not saving")
+            
+            # Only now is the snapshot on disk; changes made since stay pending
+            with self._save_lock:
+                if self._changes == changes:
+                    self._dirty = False
         except Exception as e:
             logger.error(f"Error saving preferences: {str(e)}")
     
+    def _schedule_save(self):
+        """Save after SAVE_DEBOUNCE_SECONDS without further changes"""
+        with self._save_lock:
+            self._dirty = True
+            self._changes += 1
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(self.SAVE_DEBOUNCE_SECONDS, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+    
+    def flush(self):
+        """Write pending auto-saved changes immediately"""
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if self._dirty:
+                self.save_preferences()
+    
     def get(self, key, default=None):
         """Get preference value"""
+        if key == 'last_videos':
+            return self.get_last_videos()
         return self.preferences.get(key, default)
     
     def set(self, key, value):
         """Set preference value"""
-        self.preferences[key] = value
+        with self._save_lock:
+            self.preferences[key] = value
+            if key == 'last_videos':
+                self._load_recent()
         if self.preferences.get('auto_save', True):
-            self.save_preferences()
+            self._schedule_save()
     
     def update_last_videos(self, video_path, max_recent=10):
         """Update list of recently used videos"""
-        last_videos = self.preferences.get('last_videos', [])
-        
-        # Remove if already exists
-        if video_path in last_videos:
-            last_videos.remove(video_path)
-        
-        # Add to front
-        last_videos.insert(0, video_path)
-        
-        # Keep only max_recent items
-        self.preferences['last_videos'] = last_videos[:max_recent]
+        with self._save_lock:
+            # Move to the most recent position
+            self._recent.pop(video_path, None)
+            self._recent[video_path] = None
+            
+            # Keep only max_recent items
+            while len(self._recent) > max_recent:
+                self._recent.popitem(last=False)
         
         if self.preferences.get('auto_save', True):
-            self.save_preferences()
+            self._schedule_save()
     
     def get_last_videos(self):
-        """Get list of recently used videos"""
-        return self.preferences.get('last_videos', [])
+        """Get list of recently used videos (most recent first)"""
+        return list(reversed(self._recent))
     
     def reset_to_defaults(self):
         """Reset all preferences to defaults"""
-        self.preferences = self._default_preferences()
+        with self._save_lock:
+            self.preferences = self._default_preferences()
+            self._load_recent()
         self.save_preferences()
         logger.info("Preferences reset to defaults")
@@ -1,20 +1,46 @@
 """
 Smart synchronization with learning capabilities
 """
+import os
 import json
+import atexit
 import logging
+import threading
+import weakref
 from pathlib import Path
 import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Live SmartSync instances, flushed once at exit (weak, so they can still be freed)
+_instances = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all():
+    """Don't lose learned corrections on exit"""
+    for smart in list(_instances):
+        smart.flush()
+
 
 class SmartSync:
     """Intelligent sync with learning and calibration"""
     
+    # Number of most recent corrections kept
+    MAX_CORRECTIONS = 50
+    # Seconds without new corrections before the calibration file is written
+    SAVE_DEBOUNCE_SECONDS = 1.0
+    
     def __init__(self, calibration_file="sync_calibration.json"):
         self.calibration_file = Path(calibration_file)
         self.calibration_data = self._load_calibration()
+        self._load_buffers()
+        
+        # Pending save state
+        self._dirty = False
+        self._save_timer = None
+        self._save_lock = threading.Lock()
+        _instances.add(self)
     
     def _load_calibration(self):
         """Load calibration data from previous syncs"""
@@ -26,11 +52,83 @@ class SmartSync:
                 return {'corrections': [], 'avg_correction': 0.0}
         return {'corrections': [], 'avg_correction': 0.0}
     
+    def _load_buffers(self):
+        """Copy stored corrections into fixed-size ring buffers (one array per field)"""
+        size = self.MAX_CORRECTIONS
+        entries = self.calibration_data['corrections'][-size:]
+        
+        self._auto = np.zeros(size, dtype=np.float64)
+        self._user = np.zeros(size, dtype=np.float64)
+        self._corrections = np.zeros(size, dtype=np.float64)
+        self._types = np.empty(size, dtype=object)
+        
+        count = len(entries)
+        self._auto[:count] = [c['auto'] for c in entries]
+        self._user[:count] = [c['user'] for c in entries]
+        self._corrections[:count] = [c['correction'] for c in entries]
+        self._types[:count] = [c['type'] for c in entries]
+        
+        self._count = count
+        self._head = count % size  # Next slot to write
+        
+        # The ring buffers are authoritative from here on; the list is
+        # only rebuilt when the file is written
+        self.calibration_data['corrections'] = entries
+        
+        # Derived values, recomputed only after a new correction
+        self._stats_cache = None
+        self._type_avg_cache = {}
+    
+    @property
+    def correction_count(self):
+        """Number of stored corrections (at most MAX_CORRECTIONS)"""
+        return self._count
+    
+    def _ordered_indices(self):
+        """Buffer indices from oldest to newest correction"""
+        if self._count < self.MAX_CORRECTIONS:
+            return np.arange(self._count)
+        return (self._head + np.arange(self.MAX_CORRECTIONS)) % self.MAX_CORRECTIONS
+    
+    def _schedule_save(self):
+        """Save after SAVE_DEBOUNCE_SECONDS without further corrections"""
+        with self._save_lock:
+            self._dirty = True
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(self.SAVE_DEBOUNCE_SECONDS, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+    
+    def flush(self):
+        """Write pending calibration changes immediately"""
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if self._dirty:
+                self._save_calibration()
+    
     def _save_calibration(self):
         """Save calibration data"""
         try:
-            with open(self.calibration_file, 'w') as f:
+            # The list layout is only rebuilt for the JSON file
+            self.calibration_data['corrections'] = [
+                {
+                    'auto': float(self._auto[i]),
+                    'user': float(self._user[i]),
+                    'correction': float(self._corrections[i]),
+                    'type': self._types[i]
+                }
+                for i in self._ordered_indices()
+            ]
+            
+            # Write to a temp file and swap it in, so a crash can't leave a partial file
+            tmp_file = self.calibration_file.with_suffix('.tmp')
+            with open(tmp_file, 'w') as f:
                 json.dump(self.calibration_data, f, indent=2)
+            os.replace(tmp_file, self.calibration_file)
+            self._dirty = False
         except Exception as e:
             logger.error(f"Error saving calibration: {str(e)}")
     
@@ -45,24 +143,23 @@ class SmartSync:
         """
         correction = user_offset - auto_offset
         
-        correction_entry = {
-            'auto': auto_offset,
-            'user': user_offset,
-            'correction': correction,
-            'type': video_type
-        }
-        
-        self.calibration_data['corrections'].append(correction_entry)
-        
-        # Keep only last 50 corrections
-        if len(self.calibration_data['corrections']) > 50:
-            self.calibration_data['corrections'] = self.calibration_data['corrections'][-50:]
-        
-        # Calculate average correction
-        corrections = [c['correction'] for c in self.calibration_data['corrections']]
-        self.calibration_data['avg_correction'] = np.mean(corrections)
-        
-        self._save_calibration()
+        # Under the save lock, so a pending save never sees a half-written entry
+        with self._save_lock:
+            # Write into the ring buffer, overwriting the oldest of the last 50
+            slot = self._head
+            self._auto[slot] = auto_offset
+            self._user[slot] = user_offset
+            self._corrections[slot] = correction
+            self._types[slot] = video_type
+            self._head = (slot + 1) % self.MAX_CORRECTIONS
+            self._count = min(self._count + 1, self.MAX_CORRECTIONS)
+            self._stats_cache = None
+            self._type_avg_cache = {}
+            
+            # Calculate average correction
+            self.calibration_data['avg_correction'] = float(self._corrections[:self._count].mean())
+        
+        self._schedule_save()
         
         logger.info(f"Learned: auto={auto_offset:.2f}s, user={user_offset:.2f}s, correction={correction:.2f}s")
         logger.info(f"Average correction now: {self.calibration_data['avg_correction']:.2f}s")
@@ -78,17 +175,18 @@ class SmartSync:
         Returns:
             Calibrated offset
         """
-        if not self.calibration_data['corrections']:
+        if not self._count:
             return auto_offset
         
-        # Filter corrections by type if available
-        type_corrections = [
-            c['correction'] for c in self.calibration_data['corrections']
-            if c['type'] == video_type
-        ]
+        # Filter corrections by type if available (None: no corrections of this type)
+        if video_type not in self._type_avg_cache:
+            type_mask = self._types[:self._count] == video_type
+            self._type_avg_cache[video_type] = (
+                float(self._corrections[:self._count][type_mask].mean()) if type_mask.any() else None
+            )
+        avg_correction = self._type_avg_cache[video_type]
         
-        if type_corrections:
-            avg_correction = np.mean(type_corrections)
+        if avg_correction is not None:
             logger.info(f"Using type-specific correction for '{video_type}': {avg_correction:.2f}s")
         else:
             avg_correction = self.calibration_data['avg_correction']
@@ -102,20 +200,30 @@ class SmartSync:
     
     def get_statistics(self):
         """Get calibration statistics"""
-        if not self.calibration_data['corrections']:
+        if not self._count:
             return "Nessun dato di calibrazione disponibile"
         
-        corrections = [c['correction'] for c in self.calibration_data['corrections']]
-        
-        stats = {
-            'total_corrections': len(corrections),
-            'avg_correction': np.mean(corrections),
-            'std_correction': np.std(corrections),
-            'min_correction': np.min(corrections),
-            'max_correction': np.max(corrections)
-        }
-        
-        return stats
+        # Copy so callers can't alter the cached values
+        return dict(self._statistics())
+    
+    def _statistics(self):
+        """Cached statistics dict (callers must not modify it)"""
+        if self._stats_cache is None:
+            # View on the ring buffer, no copy
+            corrections = self._corrections[:self._count]
+            avg = corrections.mean()
+            deviations = corrections - avg
+            
+            self._stats_cache = {
+                'total_corrections': self._count,
+                'avg_correction': avg,
+                # Same as corrections.std(), reusing the mean computed above
+                'std_correction': np.sqrt(np.dot(deviations, deviations) / self._count),
+                'min_correction': corrections.min(),
+                'max_correction': corrections.max()
+            }
+        
+        return self._stats_cache
     
     def suggest_offset_adjustment(self, auto_offset):
         """
@@ -127,13 +235,12 @@ class SmartSync:
         Returns:
             Tuple of (should_adjust, suggested_adjustment, confidence)
         """
-        if len(self.calibration_data['corrections']) < 3:
+        if self._count < 3:
             return False, 0.0, 0.0
         
-        corrections = [c['correction'] for c in self.calibration_data['corrections']]
-        
-        avg_correction = np.mean(corrections)
-        std_correction = np.std(corrections)
+        stats = self._statistics()
+        avg_correction = stats['avg_correction']
+        std_correction = stats['std_correction']
         
         # High confidence if corrections are consistent
         confidence = 1.0 - min(std_correction / (abs(avg_correction) + 1), 1.0)
@@ -1,30 +1,121 @@
 """
 Subtitle cleaning utilities - remove formatting, ads, etc.
 """
+import os
 import re
 import logging
+import functools
+import multiprocessing
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 
 logger = logging.getLogger(__name__)
 
+# RE2 matches alternations in linear time (DFA, no backtracking), stdlib fallback
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+# Large buffers let the OS read/write SRT files in long sequential runs
+IO_BUFFER_SIZE = 16 * 1024 * 1024
+
+# Formatting markup: HTML tags and {\an8}-style codes
+_HTML_RE = re.compile(r'<[^>]+>')
+_BRACE_RE = re.compile(r'\{[^\}]+\}')
+
+# Common OCR errors, fixed in a single pass over the file
+_OCR_FIXES = {
+    ' l ': ' I ',  # Common OCR error
+    ' l\'': ' I\'',
+    'l\'m': 'I\'m',
+    'l\'ve': 'I\'ve',
+    'l\'ll': 'I\'ll',
+    ' rn ': ' m ',  # r+n looks like m
+    '>>': '',  # Remove chevrons
+}
+_OCR_RE = re.compile('|'.join(map(re.escape, _OCR_FIXES)))
+
+# Characters deleted outright (music notes)
+_DELETE_TABLE = str.maketrans('', '', '♪♫')
+
+# Whitespace to normalize: blank lines that only contain spaces/tabs, runs of
+# two or more spaces/tabs, single tabs (single spaces never match). Newlines
+# are left alone so the SRT block structure survives.
+_SPACING_RE = re.compile(r'\n[ \t]+\n|[ \t]{2,}|\t')
+
+# Per-line strip and blank-line collapse for cleaned block text
+_LEAD_TRAIL_WS = re.compile(r'^[ \t]+|[ \t]+$', re.MULTILINE)
+_BLANK_LINES = re.compile(r'\n\s*\n+')
+
+
+def _compile_alternation(patterns, ignore_case=False):
+    """Compile patterns into one alternation, with RE2 when it is installed"""
+    source = '|'.join(f'(?:{p})' for p in patterns)
+    if RE2_AVAILABLE:
+        try:
+            return re2.compile(('(?i)' if ignore_case else '') + source)
+        except Exception as e:
+            logger.debug(f"RE2 can't compile pattern, using re: {str(e)}")
+    return re.compile(source, re.IGNORECASE if ignore_case else 0)
+
+
+def _iter_srt_cues(f):
+    """
+    Yield (index, timecode, text) cues from an open SRT file, one line at a time
+    
+    Blocks without text lines are skipped.
+    """
+    index = timecode = None
+    text = []
+    for line in f:
+        line = line.rstrip('\n')
+        if not line.strip():
+            if text:
+                yield index, timecode, '\n'.join(text)
+            index = timecode = None
+            text = []
+        elif index is None:
+            index = line
+        elif timecode is None:
+            timecode = line
+        else:
+            text.append(line)
+    if text:
+        yield index, timecode, '\n'.join(text)
+
+
+# One cleaner per worker process, so its compiled patterns and text cache
+# are reused across the files that worker handles
+_worker_cleaner = None
+
+
+def _clean_file_worker(path, options):
+    """Clean one file inside a clean_batch worker process"""
+    global _worker_cleaner
+    if _worker_cleaner is None:
+        _worker_cleaner = SubtitleCleaner()
+    return _worker_cleaner.clean_subtitle_file(path, **options)
+
 
 class SubtitleCleaner:
     """Clean and improve subtitle files"""
     
     def __init__(self):
-        # Common advertising patterns
+        # Common advertising patterns (case-insensitive)
         self.ad_patterns = [
-            r'(?i)www\.[a-z0-9\-\.]+\.[a-z]{2,}',
-            r'(?i)http[s]?://[^\s]+',
-            r'(?i)opensubtitles',
-            r'(?i)subscene',
-            r'(?i)addic7ed',
-            r'(?i)subtitles by',
-            r'(?i)synced.*corrected by',
-            r'(?i)sync.*correction',
-            r'(?i)downloaded from',
-            r'(?i)please rate',
-            r'(?i)support us',
+            r'www\.[a-z0-9\-\.]+\.[a-z]{2,}',
+            r'http[s]?://[^\s]+',
+            r'opensubtitles',
+            r'subscene',
+            r'addic7ed',
+            r'subtitles by',
+            r'synced.*corrected by',
+            r'sync.*correction',
+            r'downloaded from',
+            r'please rate',
+            r'support us',
         ]
         
         # Hearing impaired patterns
@@ -33,6 +124,13 @@ class SubtitleCleaner:
             r'\(.*?\)',  # (sighs), (phone rings)
             r'<.*?>',    # <i>text</i>
         ]
+        
+        # Each list fused into one alternation: a single scan per text
+        self._ad_re = _compile_alternation(self.ad_patterns, ignore_case=True)
+        self._hi_re = _compile_alternation(self.hi_patterns)
+        
+        # Repeated lines (ads, "♪") are cleaned once per instance
+        self._clean_text_cached = functools.lru_cache(maxsize=1024)(self._clean_text)
     
     def clean_subtitle_file(self, input_path, output_path=None, remove_ads=True, 
                            remove_hi=False, remove_formatting=False):
@@ -59,62 +157,28 @@ class SubtitleCleaner:
             
             logger.info(f"Cleaning subtitle file: {input_path.name}")
             
-            with open(input_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Parse SRT
-            blocks = content.strip().split('\n\n')
-            cleaned_blocks = []
             removed_count = 0
             
-            for block in blocks:
-                lines = block.strip().split('\n')
-                if len(lines) < 3:
-                    continue
-                
-                try:
-                    index = lines[0]
-                    timecode = lines[1]
-                    text = '\n'.join(lines[2:])
-                    
-                    # Apply cleaning
-                    original_text = text
-                    
-                    if remove_ads:
-                        text = self._remove_ads(text)
-                    
-                    if remove_hi:
-                        text = self._remove_hi(text)
-                    
-                    if remove_formatting:
-                        text = self._remove_formatting(text)
-                    
-                    # Clean up whitespace
-                    text = '\n'.join(line.strip() for line in text.split('\n') if line.strip())
-                    
-                    # Skip if empty after cleaning
-                    if not text.strip():
-                        removed_count += 1
-                        continue
-                    
-                    # Skip if it was just an ad
-                    if remove_ads and text != original_text and len(text) < 10:
-                        removed_count += 1
+            # Stream blocks from input to a temp output, one block in memory
+            # at a time; the temp file also makes cleaning in place safe
+            tmp_path = output_path.with_name(output_path.name + '.tmp')
+            with open(input_path, 'r', encoding='utf-8', buffering=IO_BUFFER_SIZE) as src, \
+                 open(tmp_path, 'w', encoding='utf-8', buffering=IO_BUFFER_SIZE) as dst:
+                for index, timecode, text in _iter_srt_cues(src):
+                    try:
+                        text = self._clean_text_cached(text, remove_ads, remove_hi, remove_formatting)
+                        if text is None:
+                            removed_count += 1
+                            continue
+                        
+                        # Rebuild block
+                        dst.write(f"{index}\n{timecode}\n{text}\n\n")
+                        
+                    except Exception as e:
+                        logger.warning(f"Error parsing block: {str(e)}")
                         continue
-                    
-                    # Rebuild block
-                    cleaned_block = f"{index}\n{timecode}\n{text}"
-                    cleaned_blocks.append(cleaned_block)
-                    
-                except Exception as e:
-                    logger.warning(f"Error parsing block: {str(e)}")
-                    continue
             
-            # Write cleaned file
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write('\n\n'.join(cleaned_blocks))
-                if cleaned_blocks:
-                    f.write('\n\n')
+            os.replace(tmp_path, output_path)
             
             logger.info(f"Subtitle cleaned: {output_path}")
             logger.info(f"Removed {removed_count} blocks")
@@ -125,24 +189,76 @@ class SubtitleCleaner:
             logger.error(f"Error cleaning subtitles: {str(e)}")
             raise
     
+    def clean_batch(self, paths, max_workers=None, **options):
+        """
+        Clean several subtitle files in parallel worker processes
+        
+        Args:
+            paths: Input subtitle files
+            max_workers: Number of worker processes (default: CPU count)
+            **options: remove_ads / remove_hi / remove_formatting,
+                as for clean_subtitle_file
+        
+        Returns:
+            List of cleaned subtitle paths, in input order
+        """
+        paths = list(paths)
+        if len(paths) < 2:
+            return [self.clean_subtitle_file(path, **options) for path in paths]
+        
+        max_workers = min(max_workers or os.cpu_count() or 1, len(paths))
+        logger.info(f"Cleaning {len(paths)} subtitle files with {max_workers} processes")
+        
+        # spawn: workers must not inherit GUI state; each builds its own cleaner
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 mp_context=multiprocessing.get_context("spawn")) as executor:
+            return list(executor.map(_clean_file_worker, paths, [options] * len(paths)))
+    
+    def _clean_text(self, text, remove_ads, remove_hi, remove_formatting):
+        """
+        Clean the text of one subtitle block
+        
+        Returns:
+            Cleaned text, or None if the block should be removed
+        """
+        original_text = text
+        
+        if remove_ads:
+            text = self._remove_ads(text)
+        
+        if remove_hi:
+            text = self._remove_hi(text)
+        
+        if remove_formatting:
+            text = self._remove_formatting(text)
+        
+        # Clean up whitespace
+        text = _BLANK_LINES.sub('\n', _LEAD_TRAIL_WS.sub('', text)).strip()
+        
+        # Skip if empty after cleaning
+        if not text:
+            return None
+        
+        # Skip if it was just an ad
+        if remove_ads and text != original_text and len(text) < 10:
+            return None
+        
+        return text
+    
     def _remove_ads(self, text):
         """Remove advertising from text"""
-        for pattern in self.ad_patterns:
-            text = re.sub(pattern, '', text, flags=re.IGNORECASE)
-        return text
+        return self._ad_re.sub('', text)
     
     def _remove_hi(self, text):
         """Remove hearing impaired annotations"""
-        for pattern in self.hi_patterns:
-            text = re.sub(pattern, '', text)
-        return text
+        return self._hi_re.sub('', text)
     
     def _remove_formatting(self, text):
         """Remove HTML/formatting tags"""
         # Remove HTML tags
-        text = re.sub(r'<[^>]+>', '', text)
+        text = _HTML_RE.sub('', text)
         # Remove formatting codes
-        text = re.sub(r'\{[^\}]+\}', '', text)
+        text = _BRACE_RE.sub('', text)
         return text
     
     def fix_common_errors(self, input_path, output_path=None):
@@ -164,30 +280,17 @@ class SubtitleCleaner:
             else:
                 output_path = Path(output_path)
             
-            with open(input_path, 'r', encoding='utf-8') as f:
+            with open(input_path, 'r', encoding='utf-8', buffering=IO_BUFFER_SIZE) as f:
                 content = f.read()
             
             # Fix common OCR errors
-            replacements = {
-                ' l ': ' I ',  # Common OCR error
-                ' l\'': ' I\'',
-                'l\'m': 'I\'m',
-                'l\'ve': 'I\'ve',
-                'l\'ll': 'I\'ll',
-                ' rn ': ' m ',  # r+n looks like m
-                '>>': '',  # Remove chevrons
-                '♪': '',  # Remove music notes
-                '♫': '',
-            }
-            
-            for old, new in replacements.items():
-                content = content.replace(old, new)
+            content = _OCR_RE.sub(lambda m: _OCR_FIXES[m.group()], content)
+            content = content.translate(_DELETE_TABLE)
             
-            # Fix spacing
-            content = re.sub(r'\s+', ' ', content)  # Multiple spaces to single
-            content = re.sub(r'\n\s+\n', '\n\n', content)  # Clean line breaks
+            # Fix spacing: multiple spaces to single, clean line breaks
+            content = _SPACING_RE.sub(lambda m: '\n\n' if m.group()[0] == '\n' else ' ', content)
             
-            with open(output_path, 'w', encoding='utf-8') as f:
+            with open(output_path, 'w', encoding='utf-8', buffering=IO_BUFFER_SIZE) as f:
                 f.write(content)
             
             logger.info(f"Fixed common errors: {output_path}")
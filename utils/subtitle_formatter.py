@@ -4,41 +4,62 @@ Subtitle formatting utilities for SRT and VTT formats
 import logging
 from pathlib import Path
 from typing import List, Dict, Union
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
 
+def _split_timestamps(times):
+    """Split seconds into (hours, minutes, seconds, milliseconds) rows"""
+    total_ms = np.round(times * 1000).astype(np.int64)
+    hours, rest = np.divmod(total_ms, 3600000)
+    minutes, rest = np.divmod(rest, 60000)
+    secs, millis = np.divmod(rest, 1000)
+    return np.column_stack((hours, minutes, secs, millis))
+
+
 class SubtitleFormatter:
     """Format and export subtitles in different formats"""
 
     @staticmethod
     def format_timestamp_srt(seconds: float) -> str:
         """Format timestamp for SRT format (HH:MM:SS,mmm)"""
-        # Convert float seconds to integer seconds and milliseconds
-        total_seconds = int(seconds)
-        millis = int((seconds - total_seconds) * 1000)
-
-        # Calculate hours, minutes, seconds from total
-        hours = total_seconds // 3600
-        minutes = (total_seconds % 3600) // 60
-        secs = total_seconds % 60
+        # Round to whole milliseconds (3.24 is stored as 3.2399...)
+        hours, rest = divmod(round(seconds * 1000), 3600000)
+        minutes, rest = divmod(rest, 60000)
+        secs, millis = divmod(rest, 1000)
 
         return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
     
     @staticmethod
     def format_timestamp_vtt(seconds: float) -> str:
         """Format timestamp for VTT format (HH:MM:SS.mmm)"""
-        # Convert float seconds to integer seconds and milliseconds
-        total_seconds = int(seconds)
-        millis = int((seconds - total_seconds) * 1000)
-
-        # Calculate hours, minutes, seconds from total
-        hours = total_seconds // 3600
-        minutes = (total_seconds % 3600) // 60
-        secs = total_seconds % 60
+        # Round to whole milliseconds (3.24 is stored as 3.2399...)
+        hours, rest = divmod(round(seconds * 1000), 3600000)
+        minutes, rest = divmod(rest, 60000)
+        secs, millis = divmod(rest, 1000)
 
         return f"{hours:02d}:{minutes:02d}:{secs:02d}.{millis:03d}"
     
+    @staticmethod
+    def _format_timestamps(times: List[float], millis_sep: str) -> List[str]:
+        """Format many timestamps at once (millis_sep: ',' for SRT, '.' for VTT)"""
+        parts = _split_timestamps(np.asarray(times, dtype=np.float64))
+
+        return [
+            f"{h:02d}:{m:02d}:{s:02d}{millis_sep}{ms:03d}"
+            for h, m, s, ms in parts.tolist()
+        ]
+    
+    def _format_blocks(self, segments: List[Dict[str, Union[float, str]]], millis_sep: str) -> str:
+        """Build all numbered cue blocks as one string, written with a single call"""
+        starts = self._format_timestamps([segment['start'] for segment in segments], millis_sep)
+        ends = self._format_timestamps([segment['end'] for segment in segments], millis_sep)
+        return ''.join(
+            f"{i}\n{start} --> {end}\n{segment['text'].strip()}\n\n"
+            for i, (segment, start, end) in enumerate(zip(segments, starts, ends), start=1)
+        )
+    
     def export_srt(self, segments: List[Dict[str, Union[float, str]]], output_path: Union[str, Path]) -> Path:
         """
         Export subtitles in SRT format
@@ -50,15 +71,10 @@ class SubtitleFormatter:
         try:
             output_path = Path(output_path)
             
+            payload = self._format_blocks(segments, ',')
+            
             with open(output_path, 'w', encoding='utf-8') as f:
-                for i, segment in enumerate(segments, start=1):
-                    start_time = self.format_timestamp_srt(segment['start'])
-                    end_time = self.format_timestamp_srt(segment['end'])
-                    text = segment['text'].strip()
-                    
-                    f.write(f"{i}\n")
-                    f.write(f"{start_time} --> {end_time}\n")
-                    f.write(f"{text}\n\n")
+                f.write(payload)
             
             logger.info(f"SRT file created: {output_path}")
             return output_path
@@ -78,17 +94,10 @@ class SubtitleFormatter:
         try:
             output_path = Path(output_path)
             
+            payload = "WEBVTT\n\n" + self._format_blocks(segments, '.')
+            
             with open(output_path, 'w', encoding='utf-8') as f:
-                f.write("WEBVTT\n\n")
-                
-                for i, segment in enumerate(segments, start=1):
-                    start_time = self.format_timestamp_vtt(segment['start'])
-                    end_time = self.format_timestamp_vtt(segment['end'])
-                    text = segment['text'].strip()
-                    
-                    f.write(f"{i}\n")
-                    f.write(f"{start_time} --> {end_time}\n")
-                    f.write(f"{text}\n\n")
+                f.write(payload)
             
             logger.info(f"VTT file created: {output_path}")
             return output_path
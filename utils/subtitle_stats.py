@@ -5,9 +5,57 @@ import re
 import logging
 from pathlib import Path
 from collections import Counter
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Large buffers let the OS read/write SRT files in long sequential runs
+IO_BUFFER_SIZE = 16 * 1024 * 1024
+
+# SRT timing line: start and end HH:MM:SS,mmm fields
+_TS_PAIR_RE = re.compile(r'(\d{2}):(\d{2}):(\d{2}),(\d{3}) --> (\d{2}):(\d{2}):(\d{2}),(\d{3})')
+# Words counted for statistics
+_WORD_RE = re.compile(r'\b\w+\b')
+# Milliseconds per hour/minute/second/millisecond field
+_MS_WEIGHTS = np.array([3600000, 60000, 1000, 1], dtype=np.int64)
+
+
+def _iter_srt_blocks(f):
+    """Yield SRT blocks from an open file as lists of lines, one line at a time"""
+    buf = []
+    for line in f:
+        if line.strip():
+            buf.append(line.rstrip('\n'))
+        elif buf:
+            yield buf
+            buf = []
+    if buf:
+        yield buf
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _reduce_totals(starts, ends, chars, words):
+        """Total duration, characters and words of all segments (compiled)"""
+        duration = 0.0
+        total_chars = 0
+        total_words = 0
+        for i in range(starts.shape[0]):
+            duration += ends[i] - starts[i]
+            total_chars += chars[i]
+            total_words += words[i]
+        return duration, total_chars, total_words
+else:
+    def _reduce_totals(starts, ends, chars, words):
+        """Total duration, characters and words of all segments"""
+        return float((ends - starts).sum()), int(chars.sum()), int(words.sum())
+
 
 class SubtitleStats:
     """Analyze and provide statistics about subtitle files"""
@@ -28,50 +76,47 @@ class SubtitleStats:
         try:
             subtitle_path = Path(subtitle_path)
             
-            with open(subtitle_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Parse SRT
-            blocks = content.strip().split('\n\n')
-            
-            total_segments = 0
-            total_duration = 0
-            total_characters = 0
-            total_words = 0
-            words_list = []
+            # Per-segment values, converted and reduced in one numeric pass at the end
+            timings = []
+            char_counts = []
+            word_counts = []
+            word_counter = Counter()
             
-            for block in blocks:
-                lines = block.strip().split('\n')
-                if len(lines) < 3:
-                    continue
-                
-                try:
-                    # Parse timecode
-                    timecode = lines[1]
-                    if '-->' not in timecode:
+            # Parse SRT block by block, without loading the whole file
+            with open(subtitle_path, 'r', encoding='utf-8', buffering=IO_BUFFER_SIZE) as f:
+                for lines in _iter_srt_blocks(f):
+                    if len(lines) < 3:
                         continue
                     
-                    start, end = timecode.split(' --> ')
-                    start_seconds = self._parse_time(start)
-                    end_seconds = self._parse_time(end)
-                    
-                    duration = end_seconds - start_seconds
-                    
-                    # Parse text
-                    text = '\n'.join(lines[2:])
-                    words = re.findall(r'\b\w+\b', text.lower())
-                    
-                    total_segments += 1
-                    total_duration += duration
-                    total_characters += len(text)
-                    total_words += len(words)
-                    words_list.extend(words)
-                    
-                except Exception as e:
-                    logger.warning(f"Error parsing block: {str(e)}")
-                    continue
+                    try:
+                        # Timecode fields, converted to numbers after the loop
+                        match = _TS_PAIR_RE.match(lines[1].strip())
+                        if not match:
+                            continue
+                        
+                        # Parse text
+                        text = '\n'.join(lines[2:])
+                        words = _WORD_RE.findall(text.lower())
+                        
+                        timings.append(match.groups())
+                        char_counts.append(len(text))
+                        word_counts.append(len(words))
+                        word_counter.update(words)
+                        
+                    except Exception as e:
+                        logger.warning(f"Error parsing block: {str(e)}")
+                        continue
             
             # Calculate stats
+            total_segments = len(timings)
+            fields = np.array(timings, dtype=np.int64).reshape(-1, 8)
+            total_duration, total_characters, total_words = _reduce_totals(
+                (fields[:, :4] @ _MS_WEIGHTS) / 1000.0,
+                (fields[:, 4:] @ _MS_WEIGHTS) / 1000.0,
+                np.array(char_counts, dtype=np.int64),
+                np.array(word_counts, dtype=np.int64)
+            )
+            
             stats = {
                 'total_segments': total_segments,
                 'total_duration': total_duration,
@@ -81,7 +126,7 @@ class SubtitleStats:
                 'avg_chars_per_segment': total_characters / total_segments if total_segments > 0 else 0,
                 'avg_words_per_segment': total_words / total_segments if total_segments > 0 else 0,
                 'reading_speed_wpm': (total_words / (total_duration / 60)) if total_duration > 0 else 0,
-                'most_common_words': Counter(words_list).most_common(10) if words_list else []
+                'most_common_words': word_counter.most_common(10)
             }
             
             return stats
@@ -90,17 +135,6 @@ class SubtitleStats:
             logger.error(f"Error analyzing subtitles: {str(e)}")
             return {}
     
-    def _parse_time(self, timestr):
-        """Parse SRT time string to seconds"""
-        # Format: HH:MM:SS,mmm
-        timestr = timestr.strip()
-        time_part, ms_part = timestr.split(',')
-        h, m, s = map(int, time_part.split(':'))
-        ms = int(ms_part)
-        
-        total_seconds = h * 3600 + m * 60 + s + ms / 1000
-        return total_seconds
-    
     def get_summary(self, stats):
         """Get human-readable summary of stats"""
         if not stats:
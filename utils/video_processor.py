@@ -1,13 +1,100 @@
 """
 Video processing utilities for subtitle integration
 """
+import os
+import re
+import mmap
 import logging
+import functools
+import threading
 from pathlib import Path
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import subprocess
 import ffmpeg
 
 logger = logging.getLogger(__name__)
 
+# Probe results kept per (path, mtime, size); least recently used evicted first
+PROBE_CACHE_MAX_ENTRIES = 256
+_probe_cache = OrderedDict()
+_probe_cache_lock = threading.Lock()
+
+# Large buffers let the OS read/write SRT files in long sequential runs
+IO_BUFFER_SIZE = 16 * 1024 * 1024
+
+# SRT timestamp HH:MM:SS,mmm with its fields captured
+_SRT_TIME_RE = re.compile(rb'(\d{2}):(\d{2}):(\d{2}),(\d{3})')
+
+# Subtitle color names as BGR hex for FFmpeg styles
+_COLOR_BGR = {
+    'white': 'FFFFFF',
+    'black': '000000',
+    'yellow': '00FFFF',
+    'red': '0000FF',
+    'green': '00FF00',
+    'blue': 'FF0000'
+}
+
+# H.264 encoders for burning subtitles, best first, with matching quality
+# options (roughly libx264 crf=23); libx264 is the CPU fallback
+_H264_ENCODERS = (
+    ('h264_nvenc', {'preset': 'p4', 'rc': 'vbr', 'cq': 23}),
+    ('h264_qsv', {'preset': 'medium', 'global_quality': 23}),
+    ('h264_videotoolbox', {'q:v': 65}),
+)
+_CPU_ENCODER = ('libx264', {'preset': 'medium', 'crf': 23, 'threads': 0})
+
+
+def _parse_rational(value):
+    """Parse an FFmpeg rational such as '30000/1001' (0.0 if invalid)"""
+    num, _, den = value.partition('/')
+    try:
+        num = float(num)
+        den = float(den) if den else 1.0
+    except ValueError:
+        return 0.0
+    return num / den if den else 0.0
+
+
+@functools.lru_cache(maxsize=1)
+def _detect_hw_encoder():
+    """
+    Find a working hardware H.264 encoder (result is cached)
+    
+    FFmpeg builds list encoders whose hardware may be missing, so each
+    candidate encodes a few blank frames before being accepted.
+    
+    Returns:
+        (encoder name, options) tuple, or None if only the CPU is available
+    """
+    try:
+        listed = subprocess.run(
+            ['ffmpeg', '-hide_banner', '-encoders'],
+            capture_output=True, text=True, timeout=10
+        ).stdout
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.debug(f"Could not list FFmpeg encoders: {str(e)}")
+        return None
+    
+    for name, options in _H264_ENCODERS:
+        if f' {name} ' not in listed:
+            continue
+        try:
+            result = subprocess.run(
+                ['ffmpeg', '-hide_banner', '-loglevel', 'error',
+                 '-f', 'lavfi', '-i', 'color=size=256x256:duration=0.2',
+                 '-c:v', name, '-f', 'null', '-'],
+                capture_output=True, timeout=15
+            )
+        except (OSError, subprocess.SubprocessError):
+            continue
+        if result.returncode == 0:
+            logger.info(f"Hardware video encoder available: {name}")
+            return name, options
+    
+    return None
+
 
 class VideoProcessor:
     """Process videos with subtitle integration"""
@@ -65,7 +152,8 @@ class VideoProcessor:
             raise
     
     def embed_subtitles_hard(self, video_path, subtitle_path, output_path=None, 
-                            font_size=24, font_color='white', position='bottom'):
+                            font_size=24, font_color='white', position='bottom',
+                            hardware_encoding=True):
         """
         Burn subtitles directly into video (permanent, always visible)
         
@@ -76,6 +164,7 @@ class VideoProcessor:
             font_size: Subtitle font size
             font_color: Subtitle color
             position: Subtitle position (bottom, top, middle)
+            hardware_encoding: Use a GPU encoder when one is available
         
         Returns:
             Path to output video
@@ -114,18 +203,30 @@ class VideoProcessor:
             
             audio = input_video.audio
             
-            output = ffmpeg.output(
-                video,
-                audio,
-                str(output_path),
-                vcodec='libx264',
-                acodec='copy',
-                preset='medium',
-                crf=23
-            )
+            encoder = (hardware_encoding and _detect_hw_encoder()) or _CPU_ENCODER
             
-            # Run the command
-            ffmpeg.run(output, overwrite_output=True, capture_stdout=True, capture_stderr=True)
+            def encode(vcodec, options):
+                output = ffmpeg.output(
+                    video,
+                    audio,
+                    str(output_path),
+                    vcodec=vcodec,
+                    acodec='copy',
+                    **options
+                )
+                
+                # Run the command
+                ffmpeg.run(output, overwrite_output=True, capture_stdout=True, capture_stderr=True)
+            
+            logger.info(f"Video encoder: {encoder[0]}")
+            try:
+                encode(*encoder)
+            except ffmpeg.Error as e:
+                if encoder is _CPU_ENCODER:
+                    raise
+                # e.g. GPU busy or unsupported resolution: redo it on the CPU
+                logger.warning(f"{encoder[0]} failed, falling back to libx264: {str(e)}")
+                encode(*_CPU_ENCODER)
             
             logger.info(f"Hardcoded subtitles created: {output_path}")
             return output_path
@@ -178,6 +279,8 @@ class VideoProcessor:
         """
         Get information about video file
         
+        Results are cached until the file's modification time or size changes.
+        
         Args:
             video_path: Path to video file
         
@@ -185,54 +288,82 @@ class VideoProcessor:
             Dictionary with video information
         """
         try:
-            probe = ffmpeg.probe(str(video_path))
-            
-            video_info = next((s for s in probe['streams'] if s['codec_type'] == 'video'), None)
-            audio_info = next((s for s in probe['streams'] if s['codec_type'] == 'audio'), None)
-            subtitle_streams = [s for s in probe['streams'] if s['codec_type'] == 'subtitle']
-            
-            info = {
-                'duration': float(probe['format'].get('duration', 0)),
-                'size': int(probe['format'].get('size', 0)),
-                'format': probe['format'].get('format_name', 'unknown'),
-                'has_video': video_info is not None,
-                'has_audio': audio_info is not None,
-                'has_subtitles': len(subtitle_streams) > 0,
-                'subtitle_count': len(subtitle_streams)
-            }
-            
-            if video_info:
-                info['video_codec'] = video_info.get('codec_name', 'unknown')
-                info['width'] = int(video_info.get('width', 0))
-                info['height'] = int(video_info.get('height', 0))
-                fps_str = video_info.get('r_frame_rate', '0/1')
-                try:
-                    num, den = map(int, fps_str.split('/'))
-                    info['fps'] = round(num / den, 2) if den > 0 else 0.0
-                except (ValueError, ZeroDivisionError):
-                    info['fps'] = 0.0
-            
-            if audio_info:
-                info['audio_codec'] = audio_info.get('codec_name', 'unknown')
-                info['sample_rate'] = int(audio_info.get('sample_rate', 0))
-            
-            return info
+            st = os.stat(video_path)
+            key = (os.fspath(video_path), st.st_mtime_ns, st.st_size)
+            
+            with _probe_cache_lock:
+                info = _probe_cache.get(key)
+                if info is not None:
+                    _probe_cache.move_to_end(key)
+                    # Copy so callers can't alter the cached values
+                    return dict(info)
+            
+            info = self._probe_video_info(video_path)
+            
+            with _probe_cache_lock:
+                _probe_cache[key] = info
+                while len(_probe_cache) > PROBE_CACHE_MAX_ENTRIES:
+                    _probe_cache.popitem(last=False)
+            
+            return dict(info)
             
         except Exception as e:
             logger.error(f"Error getting video info: {str(e)}")
             return {}
     
-    def _color_to_hex(self, color):
-        """Convert color name to BGR hex for FFmpeg"""
-        colors = {
-            'white': 'FFFFFF',
-            'black': '000000',
-            'yellow': '00FFFF',
-            'red': '0000FF',
-            'green': '00FF00',
-            'blue': 'FF0000'
+    def get_videos_info(self, video_paths, max_workers=8):
+        """
+        Get information about several video files, probing them concurrently
+        
+        Args:
+            video_paths: Paths to video files
+            max_workers: Maximum number of ffprobe processes at once
+        
+        Returns:
+            List of video information dictionaries, in the same order
+        """
+        video_paths = list(video_paths)
+        if len(video_paths) <= 1:
+            return [self.get_video_info(path) for path in video_paths]
+        
+        # Each probe mostly waits on its ffprobe process
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(video_paths))) as executor:
+            return list(executor.map(self.get_video_info, video_paths))
+    
+    def _probe_video_info(self, video_path):
+        """Run ffprobe and build the video information dictionary"""
+        probe = ffmpeg.probe(str(video_path))
+        
+        video_info = next((s for s in probe['streams'] if s['codec_type'] == 'video'), None)
+        audio_info = next((s for s in probe['streams'] if s['codec_type'] == 'audio'), None)
+        subtitle_streams = [s for s in probe['streams'] if s['codec_type'] == 'subtitle']
+        
+        info = {
+            'duration': float(probe['format'].get('duration', 0)),
+            'size': int(probe['format'].get('size', 0)),
+            'format': probe['format'].get('format_name', 'unknown'),
+            'has_video': video_info is not None,
+            'has_audio': audio_info is not None,
+            'has_subtitles': len(subtitle_streams) > 0,
+            'subtitle_count': len(subtitle_streams)
         }
-        return colors.get(color.lower(), 'FFFFFF')
+        
+        if video_info:
+            info['video_codec'] = video_info.get('codec_name', 'unknown')
+            info['width'] = int(video_info.get('width', 0))
+            info['height'] = int(video_info.get('height', 0))
+            info['fps'] = round(_parse_rational(video_info.get('r_frame_rate', '0/1')), 2)
+        
+        if audio_info:
+            info['audio_codec'] = audio_info.get('codec_name', 'unknown')
+            info['sample_rate'] = int(audio_info.get('sample_rate', 0))
+        
+        return info
+    
+    @staticmethod
+    def _color_to_hex(color):
+        """Convert color name to BGR hex for FFmpeg"""
+        return _COLOR_BGR.get(color.lower(), 'FFFFFF')
     
     def sync_subtitles(self, subtitle_path, offset_seconds, output_path=None):
         """
@@ -247,9 +378,6 @@ class VideoProcessor:
             Path to synced subtitle file
         """
         try:
-            from datetime import timedelta
-            import re
-            
             subtitle_path = Path(subtitle_path)
             
             if not output_path:
@@ -259,17 +387,11 @@ class VideoProcessor:
             
             logger.info(f"Syncing subtitles with offset: {offset_seconds}s")
             
-            with open(subtitle_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            offset_ms = int(offset_seconds * 1000)
             
             # Parse and adjust timestamps
             def adjust_timestamp(match):
-                time_str = match.group(0)
-                # Parse timestamp
-                hours, minutes, seconds, milliseconds = re.match(
-                    r'(\d{2}):(\d{2}):(\d{2}),(\d{3})',
-                    time_str
-                ).groups()
+                hours, minutes, seconds, milliseconds = match.groups()
                 
                 # Convert to total milliseconds
                 total_ms = (
@@ -280,28 +402,35 @@ class VideoProcessor:
                 )
                 
                 # Add offset
-                total_ms += int(offset_seconds * 1000)
+                total_ms += offset_ms
                 
                 # Convert back to timestamp
                 if total_ms < 0:
                     total_ms = 0
                 
-                hours = total_ms // 3600000
-                minutes = (total_ms % 3600000) // 60000
-                seconds = (total_ms % 60000) // 1000
-                milliseconds = total_ms % 1000
+                hours, rest = divmod(total_ms, 3600000)
+                minutes, rest = divmod(rest, 60000)
+                seconds, milliseconds = divmod(rest, 1000)
                 
-                return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
-            
-            # Replace all timestamps
-            synced_content = re.sub(
-                r'\d{2}:\d{2}:\d{2},\d{3}',
-                adjust_timestamp,
-                content
-            )
-            
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(synced_content)
+                return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}".encode('ascii')
+            
+            # Replace all timestamps, scanning the memory-mapped input as raw
+            # bytes (timestamps are ASCII, so UTF-8 text is copied through
+            # undecoded) and writing into a temp file, which also makes
+            # syncing a file onto itself safe
+            tmp_path = output_path.with_name(output_path.name + '.tmp')
+            with open(subtitle_path, 'rb') as src, \
+                 open(tmp_path, 'wb', buffering=IO_BUFFER_SIZE) as dst:
+                if os.fstat(src.fileno()).st_size:
+                    with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        pos = 0
+                        for match in _SRT_TIME_RE.finditer(mm):
+                            dst.write(mm[pos:match.start()])
+                            dst.write(adjust_timestamp(match))
+                            pos = match.end()
+                        dst.write(mm[pos:])
+            
+            os.replace(tmp_path, output_path)
             
             logger.info(f"Synced subtitles saved: {output_path}")
             return output_path
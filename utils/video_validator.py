@@ -1,19 +1,305 @@
 """
 Video validation utilities to check video files before processing
 """
+import os
+import json
+import asyncio
+import stat
+import sqlite3
 import logging
+import functools
+import threading
+from dataclasses import dataclass, asdict
+from fractions import Fraction
 from pathlib import Path
 import subprocess
-import ffmpeg
+import config
+from config import SUPPORTED_VIDEO_FORMATS
 
 logger = logging.getLogger(__name__)
 
+# Fast JSON for ffprobe output and the probe cache, stdlib fallback (both work on bytes)
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+    
+    def _json_dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+
+# Set form of the supported extensions for the per-file suffix test,
+# and their list for error messages, both built once
+_VIDEO_SUFFIXES = frozenset(fmt.lower() for fmt in SUPPORTED_VIDEO_FORMATS)
+_SUPPORTED_FORMATS_STR = ', '.join(SUPPORTED_VIDEO_FORMATS)
+
+# Codecs that trigger a warning (but don't fail validation)
+_UNCOMMON_VIDEO_CODECS = frozenset({'rv40', 'vp6', 'msmpeg4v3', 'wmv1', 'wmv2'})
+_UNCOMMON_AUDIO_CODECS = frozenset({'cook', 'sipr', 'truespeech'})
+
+# Probe results kept in the SQLite cache (oldest dropped beyond this)
+PROBE_CACHE_MAX_ENTRIES = 5000
+
+# Shared connection to the probe cache, opened on first use (False if unavailable)
+_probe_db = None
+_probe_db_lock = threading.Lock()
+
+# Only the fields validate_video_file reads, so ffprobe emits a small JSON
+_PROBE_ENTRIES = (
+    'format=duration:'
+    'stream=codec_type,codec_name,width,height,r_frame_rate,sample_rate,channels'
+)
+
+
+# Header-only probing: stop after the first 32KB instead of analyzing streams
+_QUICK_PROBE_ARGS = ('-analyzeduration', '0', '-probesize', '32k')
+
+# Containers whose header stores the real duration and stream parameters;
+# others (TS, AVI, MPEG-PS, ...) only give a bitrate estimate from 32KB
+_QUICK_PROBE_SUFFIXES = frozenset({'.mp4', '.m4v', '.mov', '.mkv', '.webm'})
+
+
+def _probe_args(path, quick):
+    """ffprobe command line for the validation fields only"""
+    args = ['ffprobe', '-v', 'error']
+    if quick:
+        args.extend(_QUICK_PROBE_ARGS)
+    args.extend(['-show_entries', _PROBE_ENTRIES, '-of', 'json', path])
+    return args
+
+
+def _positive(value):
+    """Whether an ffprobe field (int or numeric string) is greater than zero"""
+    try:
+        return float(value) > 0
+    except (TypeError, ValueError):
+        return False
+
+
+def _probe_is_complete(probe):
+    """
+    Whether a probe has everything validation needs: a duration, and a
+    video stream with its size and an audio stream with its sample rate
+    """
+    if not _positive(probe.get('format', {}).get('duration')):
+        return False
+    video_stream = audio_stream = None
+    for stream in probe.get('streams', ()):
+        codec_type = stream.get('codec_type')
+        if codec_type == 'video' and video_stream is None:
+            video_stream = stream
+        elif codec_type == 'audio' and audio_stream is None:
+            audio_stream = stream
+    return (video_stream is not None and audio_stream is not None
+            and _positive(video_stream.get('width'))
+            and _positive(video_stream.get('height'))
+            and _positive(audio_stream.get('sample_rate')))
+
+
+def _use_quick_probe(path):
+    """Whether the container is one whose header-only probe can be trusted"""
+    return os.path.splitext(path)[1].lower() in _QUICK_PROBE_SUFFIXES
+
+
+def _run_probe(path, quick):
+    """Run ffprobe once; raises CalledProcessError with stderr on failure"""
+    result = subprocess.run(
+        _probe_args(path, quick),
+        stdin=subprocess.DEVNULL, capture_output=True, check=True
+    )
+    return _json_loads(result.stdout)
+
+
+def _probe_minimal(path):
+    """
+    Run ffprobe for the validation fields only
+    
+    For containers with the duration in their header, only the header is
+    read first; the full probe runs for other containers, or when the
+    header probe fails or misses a required field.
+    
+    Raises:
+        subprocess.CalledProcessError: If ffprobe fails (stderr is captured)
+    """
+    if _use_quick_probe(path):
+        try:
+            probe = _run_probe(path, quick=True)
+            if _probe_is_complete(probe):
+                return probe
+        except (subprocess.CalledProcessError, ValueError):
+            pass
+    return _run_probe(path, quick=False)
+
+
+async def _run_probe_async(path, quick):
+    """Async variant of _run_probe"""
+    args = _probe_args(path, quick)
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await process.communicate()
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, args, stdout, stderr)
+    return _json_loads(stdout)
+
+
+async def _probe_minimal_async(path):
+    """Async variant of _probe_minimal, running ffprobe without blocking the loop"""
+    if _use_quick_probe(path):
+        try:
+            probe = await _run_probe_async(path, quick=True)
+            if _probe_is_complete(probe):
+                return probe
+        except (subprocess.CalledProcessError, ValueError):
+            pass
+    return await _run_probe_async(path, quick=False)
+
+
+def _probe_db_connection():
+    """Open the probe cache database once (call with _probe_db_lock held)"""
+    global _probe_db
+    if _probe_db is None:
+        try:
+            # One connection for all threads, serialized by _probe_db_lock
+            _probe_db = sqlite3.connect(str(config.CACHE_DIR / "probes.sqlite"),
+                                        check_same_thread=False)
+            _probe_db.execute("PRAGMA journal_mode=WAL")
+            _probe_db.execute(
+                "CREATE TABLE IF NOT EXISTS probes ("
+                "path TEXT, mtime_ns INTEGER, size INTEGER, probe_json BLOB, "
+                "PRIMARY KEY (path, mtime_ns, size))"
+            )
+            _probe_db.commit()
+        except sqlite3.Error as e:
+            logger.debug(f"Probe cache disabled: {str(e)}")
+            _probe_db = False
+    return _probe_db
+
+
+def _load_cached_probe(path, mtime_ns, size):
+    """Stored probe result for one version of a file, or None"""
+    with _probe_db_lock:
+        db = _probe_db_connection()
+        if not db:
+            return None
+        try:
+            row = db.execute(
+                "SELECT probe_json FROM probes WHERE path = ? AND mtime_ns = ? AND size = ?",
+                (path, mtime_ns, size)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.debug(f"Probe cache lookup failed: {str(e)}")
+            return None
+    if row is None:
+        return None
+    try:
+        return _json_loads(row[0])
+    except ValueError:
+        return None
+
+
+def _save_cached_probe(path, mtime_ns, size, probe):
+    """Store a probe result, dropping the oldest beyond PROBE_CACHE_MAX_ENTRIES"""
+    blob = _json_dumps(probe)
+    with _probe_db_lock:
+        db = _probe_db_connection()
+        if not db:
+            return
+        try:
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?)",
+                    (path, mtime_ns, size, blob)
+                )
+                db.execute(
+                    "DELETE FROM probes WHERE rowid IN "
+                    "(SELECT rowid FROM probes ORDER BY rowid DESC LIMIT -1 OFFSET ?)",
+                    (PROBE_CACHE_MAX_ENTRIES,)
+                )
+        except sqlite3.Error as e:
+            logger.debug(f"Could not cache probe result: {str(e)}")
+
+
+@functools.lru_cache(maxsize=128)
+def _probe_cached(path, mtime_ns, size):
+    """
+    Probe a video with ffprobe, once per (path, mtime, size)
+    
+    Results are also stored in CACHE_DIR/probes.sqlite so later runs
+    reuse them; a changed file gets a new key. The returned dict is
+    shared and must not be modified.
+    """
+    probe = _load_cached_probe(path, mtime_ns, size)
+    if probe is None:
+        probe = _probe_minimal(path)
+        _save_cached_probe(path, mtime_ns, size, probe)
+    return probe
+
+
+async def _probe_cached_async(path, mtime_ns, size):
+    """Async variant of _probe_cached, sharing its on-disk cache"""
+    # SQLite I/O runs in worker threads to keep the event loop free
+    probe = await asyncio.to_thread(_load_cached_probe, path, mtime_ns, size)
+    if probe is None:
+        probe = await _probe_minimal_async(path)
+        await asyncio.to_thread(_save_cached_probe, path, mtime_ns, size, probe)
+    return probe
+
+
+@functools.lru_cache(maxsize=64)
+def _parse_frame_rate(value):
+    """FPS from an ffprobe rate string like '30000/1001' (0.0 if invalid)"""
+    try:
+        return round(float(Fraction(value)), 2)
+    except (ValueError, TypeError, ZeroDivisionError):
+        return 0.0
+
 
 class VideoValidationError(Exception):
     """Exception raised when video validation fails"""
     pass
 
 
+@dataclass(frozen=True)
+class VideoInfo:
+    """Validated video file information"""
+    # Explicit slots (dataclass(slots=True) needs Python 3.10)
+    __slots__ = ('path', 'size_bytes', 'size_mb', 'duration', 'duration_formatted',
+                 'video_codec', 'audio_codec', 'width', 'height', 'fps',
+                 'audio_sample_rate', 'audio_channels', 'has_subtitles', 'warnings')
+    
+    path: str
+    size_bytes: int
+    size_mb: float
+    duration: float
+    duration_formatted: str
+    video_codec: str
+    audio_codec: str
+    width: int
+    height: int
+    fps: float
+    audio_sample_rate: int
+    audio_channels: int
+    has_subtitles: bool
+    warnings: tuple
+    
+    @property
+    def valid(self):
+        """Always True: invalid files raise VideoValidationError instead"""
+        return True
+    
+    def to_dict(self):
+        """Plain dict with the same keys, for callers expecting a mapping"""
+        info = asdict(self)
+        info['valid'] = True
+        info['warnings'] = list(self.warnings)
+        return info
+
+
 class VideoValidator:
     """Validate video files before processing"""
     
@@ -28,71 +314,126 @@ class VideoValidator:
             video_path: Path to video file
         
         Returns:
-            Dict with validation results and video info
+            VideoInfo with the video details
         
         Raises:
             VideoValidationError: If video is invalid
         """
         video_path = Path(video_path)
+        st = self._check_file(video_path)
         
-        # Check 1: File exists
-        if not video_path.exists():
-            raise VideoValidationError(f"File non trovato: {video_path}")
+        try:
+            probe = _probe_cached(os.path.abspath(video_path), st.st_mtime_ns, st.st_size)
+        except Exception as e:
+            raise self._probe_error(e) from e
         
-        # Check 2: File is not empty
-        file_size = video_path.stat().st_size
-        if file_size == 0:
-            raise VideoValidationError("Il file video è vuoto (0 bytes)")
+        return self._build_video_info(video_path, st.st_size, probe)
+    
+    async def validate_many(self, paths, concurrency=None):
+        """
+        Validate several video files, running their ffprobe calls concurrently
         
-        # Check 3: File is not too small (likely corrupted)
-        if file_size < 1024:  # Less than 1KB
-            raise VideoValidationError("Il file video è troppo piccolo, probabilmente corrotto")
+        Args:
+            paths: Video file paths
+            concurrency: Maximum simultaneous ffprobe processes
+                (default: CPU count)
         
-        # Check 4: File extension is supported
-        from config import SUPPORTED_VIDEO_FORMATS
-        if video_path.suffix.lower() not in SUPPORTED_VIDEO_FORMATS:
+        Returns:
+            List with, for each path in order, its VideoInfo or the
+            VideoValidationError that rejected it
+        """
+        limit = asyncio.Semaphore(concurrency or os.cpu_count() or 1)
+        
+        async def validate(video_path):
+            video_path = Path(video_path)
+            try:
+                # Stats overlap in worker threads instead of blocking the
+                # loop one by one (slow on network shares)
+                st = await asyncio.to_thread(self._check_file, video_path)
+                try:
+                    async with limit:
+                        probe = await _probe_cached_async(
+                            os.path.abspath(video_path), st.st_mtime_ns, st.st_size
+                        )
+                except Exception as e:
+                    raise self._probe_error(e) from e
+                return self._build_video_info(video_path, st.st_size, probe)
+            except VideoValidationError as e:
+                return e
+        
+        return await asyncio.gather(*(validate(path) for path in paths))
+    
+    def _check_file(self, video_path):
+        """Checks that need no probe; returns the file's stat result"""
+        # Check 1: File extension is supported (string test, no disk access)
+        if video_path.suffix.lower() not in _VIDEO_SUFFIXES:
             raise VideoValidationError(
                 f"Formato video non supportato: {video_path.suffix}\n"
-                f"Formati supportati: {', '.join(SUPPORTED_VIDEO_FORMATS)}"
+                f"Formati supportati: {_SUPPORTED_FORMATS_STR}"
             )
         
-        # Check 5: File is readable
-        try:
-            with open(video_path, 'rb') as f:
-                f.read(1024)  # Try to read first KB
-        except PermissionError:
-            raise VideoValidationError("Impossibile leggere il file: permessi insufficienti")
-        except Exception as e:
-            raise VideoValidationError(f"Impossibile leggere il file: {str(e)}")
+        # Check 2: File exists and is a regular file (one stat for all size checks)
+        st = self._stat_file(video_path)
         
-        # Check 6: Probe video with FFmpeg
-        try:
-            probe = ffmpeg.probe(str(video_path))
-        except ffmpeg.Error as e:
-            error_msg = e.stderr.decode('utf-8', errors='ignore') if e.stderr else str(e)
+        # Check 3: File is not empty
+        file_size = st.st_size
+        if file_size == 0:
+            raise VideoValidationError("Il file video è vuoto (0 bytes)")
+        
+        # Check 4: File is not too small (likely corrupted)
+        if file_size < 1024:  # Less than 1KB
+            raise VideoValidationError("Il file video è troppo piccolo, probabilmente corrotto")
+        
+        return st
+    
+    def _probe_error(self, error):
+        """
+        Check 5: Map a failed FFmpeg probe to a validation error
+        (this also covers unreadable files)
+        """
+        if isinstance(error, subprocess.CalledProcessError):
+            error_msg = error.stderr.decode('utf-8', errors='ignore') if error.stderr else str(error)
             if 'Invalid data found' in error_msg:
-                raise VideoValidationError("File video corrotto o non valido")
+                return VideoValidationError("File video corrotto o non valido")
             elif 'No such file' in error_msg:
-                raise VideoValidationError("File non trovato")
+                return VideoValidationError("File non trovato")
+            elif 'Permission denied' in error_msg:
+                return VideoValidationError("Impossibile leggere il file: permessi insufficienti")
             else:
-                raise VideoValidationError(f"Impossibile analizzare il video: {error_msg[:200]}")
-        except Exception as e:
-            raise VideoValidationError(f"Errore durante l'analisi del video: {str(e)}")
+                return VideoValidationError(f"Impossibile analizzare il video: {error_msg[:200]}")
+        if isinstance(error, json.JSONDecodeError):
+            # Also orjson's decode error, which subclasses it
+            return VideoValidationError("Impossibile analizzare il video")
+        return VideoValidationError(f"Errore durante l'analisi del video: {str(error)}")
+    
+    def _build_video_info(self, video_path, file_size, probe):
+        """Checks on the probe result; returns the VideoInfo"""
+        # First video and audio stream, and any subtitle track, in one pass
+        video_stream = audio_stream = None
+        has_subtitles = False
+        for stream in probe.get('streams', ()):
+            codec_type = stream.get('codec_type')
+            if codec_type == 'video':
+                if video_stream is None:
+                    video_stream = stream
+            elif codec_type == 'audio':
+                if audio_stream is None:
+                    audio_stream = stream
+            elif codec_type == 'subtitle':
+                has_subtitles = True
         
-        # Check 7: Video has video stream
-        video_streams = [s for s in probe.get('streams', []) if s.get('codec_type') == 'video']
-        if not video_streams:
+        # Check 6: Video has video stream
+        if video_stream is None:
             raise VideoValidationError("Il file non contiene un flusso video valido")
         
-        # Check 8: Video has audio stream (required for subtitle generation)
-        audio_streams = [s for s in probe.get('streams', []) if s.get('codec_type') == 'audio']
-        if not audio_streams:
+        # Check 7: Video has audio stream (required for subtitle generation)
+        if audio_stream is None:
             raise VideoValidationError(
                 "Il file non contiene traccia audio.\n"
                 "L'audio è necessario per generare i sottotitoli automaticamente."
             )
         
-        # Check 9: Duration is valid
+        # Check 8: Duration is valid
         try:
             duration = float(probe.get('format', {}).get('duration', 0))
             if duration <= 0:
@@ -102,56 +443,65 @@ class VideoValidator:
         except (ValueError, TypeError):
             raise VideoValidationError("Impossibile determinare la durata del video")
         
-        # Check 10: Codec is supported
-        video_codec = video_streams[0].get('codec_name', 'unknown')
-        audio_codec = audio_streams[0].get('codec_name', 'unknown')
+        # Check 9: Codec is supported
+        video_codec = video_stream.get('codec_name', 'unknown')
+        audio_codec = audio_stream.get('codec_name', 'unknown')
         
         # Warn about uncommon codecs (but don't fail)
-        uncommon_video_codecs = ['rv40', 'vp6', 'msmpeg4v3', 'wmv1', 'wmv2']
-        uncommon_audio_codecs = ['cook', 'sipr', 'truespeech']
-        
-        warnings = []
-        if video_codec in uncommon_video_codecs:
-            warnings.append(f"Codec video non comune: {video_codec}. Potrebbero verificarsi problemi.")
-        if audio_codec in uncommon_audio_codecs:
-            warnings.append(f"Codec audio non comune: {audio_codec}. Potrebbero verificarsi problemi.")
+        warnings = ()
+        if video_codec in _UNCOMMON_VIDEO_CODECS:
+            warnings += (f"Codec video non comune: {video_codec}. Potrebbero verificarsi problemi.",)
+        if audio_codec in _UNCOMMON_AUDIO_CODECS:
+            warnings += (f"Codec audio non comune: {audio_codec}. Potrebbero verificarsi problemi.",)
         
         # Gather video information
-        video_info = {
-            'valid': True,
-            'path': str(video_path),
-            'size_bytes': file_size,
-            'size_mb': round(file_size / (1024 * 1024), 2),
-            'duration': duration,
-            'duration_formatted': self._format_duration(duration),
-            'video_codec': video_codec,
-            'audio_codec': audio_codec,
-            'width': video_streams[0].get('width', 0),
-            'height': video_streams[0].get('height', 0),
-            'fps': self._get_fps(video_streams[0]),
-            'audio_sample_rate': audio_streams[0].get('sample_rate', 0),
-            'audio_channels': audio_streams[0].get('channels', 0),
-            'has_subtitles': any(s.get('codec_type') == 'subtitle' for s in probe.get('streams', [])),
-            'warnings': warnings
-        }
-        
-        logger.info(f"Video validation successful: {video_path.name}")
-        logger.info(f"  Duration: {video_info['duration_formatted']}")
-        logger.info(f"  Resolution: {video_info['width']}x{video_info['height']}")
-        logger.info(f"  Video codec: {video_codec}")
-        logger.info(f"  Audio codec: {audio_codec}")
-        
-        if warnings:
-            for warning in warnings:
-                logger.warning(f"  ⚠️ {warning}")
+        video_info = VideoInfo(
+            path=str(video_path),
+            size_bytes=file_size,
+            size_mb=round(file_size / (1024 * 1024), 2),
+            duration=duration,
+            duration_formatted=self._format_duration(duration),
+            video_codec=video_codec,
+            audio_codec=audio_codec,
+            width=video_stream.get('width', 0),
+            height=video_stream.get('height', 0),
+            fps=self._get_fps(video_stream),
+            audio_sample_rate=audio_stream.get('sample_rate', 0),
+            audio_channels=audio_stream.get('channels', 0),
+            has_subtitles=has_subtitles,
+            warnings=warnings
+        )
+        
+        # Lazy %-formatting behind one level check: batch validation
+        # runs this per file, usually with INFO disabled
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Video validation successful: %s", video_path.name)
+            logger.info("  Duration: %s", video_info.duration_formatted)
+            logger.info("  Resolution: %sx%s", video_info.width, video_info.height)
+            logger.info("  Video codec: %s", video_codec)
+            logger.info("  Audio codec: %s", audio_codec)
+        
+        for warning in warnings:
+            logger.warning("  ⚠️ %s", warning)
         
         return video_info
     
+    def _stat_file(self, video_path):
+        """Stat a video path once, raising if it is missing or not a regular file"""
+        try:
+            st = os.stat(video_path)
+        except FileNotFoundError:
+            raise VideoValidationError(f"File non trovato: {video_path}")
+        except OSError as e:
+            raise VideoValidationError(f"Impossibile leggere il file: {str(e)}")
+        if not stat.S_ISREG(st.st_mode):
+            raise VideoValidationError(f"Non è un file valido: {video_path}")
+        return st
+    
     def _format_duration(self, seconds):
         """Format duration in human-readable format"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
+        hours, rest = divmod(int(seconds), 3600)
+        minutes, secs = divmod(rest, 60)
         
         if hours > 0:
             return f"{hours}h {minutes}m {secs}s"
@@ -162,19 +512,15 @@ class VideoValidator:
     
     def _get_fps(self, video_stream):
         """Extract FPS from video stream"""
-        try:
-            fps_str = video_stream.get('r_frame_rate', '0/1')
-            num, den = map(int, fps_str.split('/'))
-            if den > 0:
-                return round(num / den, 2)
-        except:
-            pass
-        return 0.0
+        return _parse_frame_rate(video_stream.get('r_frame_rate', '0/1'))
     
     def quick_check(self, video_path):
         """
         Quick validation check (less thorough, faster)
         
+        Only the extension and read access are checked, with a single
+        syscall; size and content are left to validate_video_file.
+        
         Args:
             video_path: Path to video file
         
@@ -186,18 +532,13 @@ class VideoValidator:
         """
         video_path = Path(video_path)
         
-        # Basic checks only
-        if not video_path.exists():
-            raise VideoValidationError(f"File non trovato: {video_path}")
-        
-        file_size = video_path.stat().st_size
-        if file_size == 0:
-            raise VideoValidationError("Il file video è vuoto")
-        
-        from config import SUPPORTED_VIDEO_FORMATS
-        if video_path.suffix.lower() not in SUPPORTED_VIDEO_FORMATS:
+        # Extension first, since it needs no disk access
+        if video_path.suffix.lower() not in _VIDEO_SUFFIXES:
             raise VideoValidationError(
                 f"Formato video non supportato: {video_path.suffix}"
             )
         
+        if not os.access(video_path, os.R_OK):
+            raise VideoValidationError(f"File non trovato o non leggibile: {video_path}")
+        
         return True